@@ -78,6 +78,11 @@ def readCommand(argv):
                       dest='gradeQuestion',
                       default=None,
                       help='Grade one particular question.')
+    parser.add_option('--jobs', '-j',
+                      dest='jobs',
+                      type='int',
+                      default=1,
+                      help='Number of processes to play the games of each test in')
     parser.add_option('--no-graphics',
                       dest='noGraphics',
                       action='store_true',
@@ -338,6 +343,8 @@ if __name__ == '__main__':
     options = readCommand(sys.argv)
     if options.generateSolutions:
         confirmGenerate()
+    import pacman
+    pacman.JOBS = options.jobs
     codePaths = options.studentCode.split(',')
 
     moduleDict = {}
@@ -0,0 +1,170 @@
+# benchmarks.py
+# -------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Micro-benchmarks for the Pacman game engine.
+
+> python benchmarks.py -b grid -l originalClassic
+> python benchmarks.py -b games -l smallClassic
+> python benchmarks.py -b actions -l mediumClassic
+
+Run with --help for the list of benchmarks.
+"""
+
+import optparse
+import random
+import sys
+import time
+import layout
+
+
+def timePerOperation(function, operations):
+    "Runs function() once and returns the average time per operation in microseconds"
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1e6 / max(operations, 1)
+
+
+def loadLayout(name, gridBackend='list'):
+    backend = layout.GRID_BACKEND
+    layout.GRID_BACKEND = gridBackend
+    try:
+        board = layout.getLayout(name)
+    finally:
+        layout.GRID_BACKEND = backend
+    if board == None:
+        raise Exception("The layout " + name + " cannot be found")
+    return board
+
+
+def benchmarkGrid(options):
+    """
+    Times the bulk Grid operations used on every move (count, asList, copy,
+    hash, packBits) and single cell reads on the food and walls of the layout,
+    for each Grid backend.
+    """
+    print('%-10s %10s %10s %10s %10s %10s %10s' %
+          ('backend', 'count us', 'asList us', 'copy us', 'hash us', 'pack us', 'read ns'))
+    for backend in sorted(layout.GRID_BACKENDS):
+        board = loadLayout(options.layout, backend)
+        food, walls = board.food, board.walls
+        cells = [(x, y) for x in range(walls.width) for y in range(walls.height)]
+        repeat = options.repeat
+
+        def run(operation):
+            def function():
+                for i in range(repeat):
+                    operation()
+            return timePerOperation(function, repeat)
+
+        def read():
+            for i in range(repeat // 100 + 1):
+                for x, y in cells:
+                    walls[x][y]
+        costs = [run(food.count), run(food.asList), run(food.copy),
+                 run(lambda: hash(food)), run(food.packBits),
+                 timePerOperation(read, (repeat // 100 + 1) * len(cells)) * 1000]
+        print('%-10s %10.3f %10.3f %10.3f %10.3f %10.3f %10.1f' % tuple([backend] + costs))
+
+
+def benchmarkGames(options):
+    """
+    Plays quiet games of GreedyAgent against two RandomGhosts with Game.run and
+    with Game.runHeadless and reports games and moves per second.  The games
+    use the same seeds, so both loops play the same moves.
+    """
+    import pacman
+    import textDisplay
+    from pacmanAgents import GreedyAgent
+    from ghostAgents import RandomGhost
+    board = loadLayout(options.layout)
+    print('%-12s %10s %10s' % ('loop', 'games/s', 'moves/s'))
+    for loop in ['run', 'runHeadless']:
+        moves = 0
+        start = time.perf_counter()
+        for seed in range(options.numGames):
+            random.seed(seed)
+            rules = pacman.ClassicGameRules()
+            game = rules.newGame(board, GreedyAgent(), [RandomGhost(1), RandomGhost(2)],
+                                 textDisplay.NullGraphics(), quiet=True)
+            getattr(game, loop)()
+            moves += len(game.moveHistory)
+        elapsed = time.perf_counter() - start
+        print('%-12s %10.1f %10.0f' % (loop, options.numGames / elapsed, moves / elapsed))
+
+
+def benchmarkActions(options):
+    """
+    Reports calls per second of Actions.getPossibleActions and
+    Actions.getLegalNeighbors over every open cell of the layout, and the
+    time taken to build the layout's move table on first use.
+    """
+    from game import Actions, Configuration, Directions
+    board = loadLayout(options.layout)
+    walls = board.walls
+    cells = [(x, y) for x in range(1, walls.width - 1)
+             for y in range(1, walls.height - 1) if not walls[x][y]]
+    configurations = [Configuration((float(x), float(y)), Directions.STOP) for x, y in cells]
+    rounds = options.repeat // len(cells) + 1
+    build = timePerOperation(lambda: Actions.getMoveTable(walls.copy()), 1)
+
+    def possibleActions():
+        for i in range(rounds):
+            for configuration in configurations:
+                Actions.getPossibleActions(configuration, walls)
+
+    def legalNeighbors():
+        for i in range(rounds):
+            for cell in cells:
+                Actions.getLegalNeighbors(cell, walls)
+    calls = rounds * len(cells)
+    print('%-20s %12s' % ('function', 'calls/s'))
+    for name, function in [('getPossibleActions', possibleActions), ('getLegalNeighbors', legalNeighbors)]:
+        print('%-20s %12.0f' % (name, 1e6 / timePerOperation(function, calls)))
+    print('move table built in %.2f ms' % (build / 1000))
+
+
+BENCHMARKS = {
+    'actions': benchmarkActions,
+    'games': benchmarkGames,
+    'grid': benchmarkGrid,
+}
+
+
+def readCommand(argv):
+    parser = optparse.OptionParser(
+        description='Benchmark the Pacman game engine')
+    parser.add_option('-b', '--benchmark', dest='benchmarks', default=','.join(sorted(BENCHMARKS)),
+                      help='Comma separated benchmarks to run, from: %s' % ', '.join(sorted(BENCHMARKS)))
+    parser.add_option('-l', '--layout', dest='layout', default='originalClassic',
+                      help='The layout to benchmark on [Default: %default]')
+    parser.add_option('--repeat', dest='repeat', type='int', default=10000,
+                      help='Number of times each operation is timed [Default: %default]')
+    parser.add_option('-n', '--numGames', dest='numGames', type='int', default=50,
+                      help='Number of games played by the games benchmark [Default: %default]')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    options.benchmarks = options.benchmarks.split(',')
+    for name in options.benchmarks:
+        if name not in BENCHMARKS:
+            raise Exception('Unknown benchmark: ' + name)
+    return options
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    for name in options.benchmarks:
+        print('== %s ==' % name)
+        BENCHMARKS[name](options)
@@ -0,0 +1,131 @@
+# distanceFields.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Maze distances to target cells, for ghost agents and evaluation functions.
+
+The distance field of a target cell holds the length of the shortest path
+from every cell of the maze to it, found with one breadth first search the
+first time the target is asked for.  Fields are kept per wall Grid, up to a
+bound, after which the least recently used one is dropped:
+
+  fields = getDistanceFields(gameState.getWalls())
+  fields.getDistance(ghostPosition, gameState.getPacmanPosition())
+"""
+
+import array
+import collections
+
+UNREACHABLE = 0xFFFF
+
+# Fields kept per wall Grid; a field costs 2 bytes per cell of the Grid
+MAX_FIELDS = 1024
+
+
+class DistanceFields:
+    """
+    Maze distance fields of a wall Grid.  A field is an array('H') indexed by
+    x * height + y, holding UNREACHABLE for walls and cells cut off from the
+    target.
+    """
+
+    def __init__(self, walls, maxFields=MAX_FIELDS):
+        self.width, self.height = walls.width, walls.height
+        self.maxFields = maxFields
+        self.fields = collections.OrderedDict()
+        self.fieldsBuilt = 0
+        height = self.height
+        self.free = [not walls[x][y] for x in range(self.width) for y in range(height)]
+        self.neighbors = []
+        for x in range(self.width):
+            for y in range(height):
+                cells = []
+                for nx, ny in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+                    if 0 <= nx < self.width and 0 <= ny < height and self.free[nx * height + ny]:
+                        cells.append(nx * height + ny)
+                self.neighbors.append(cells)
+
+    def getField(self, target):
+        "Returns the distance field of an integer position, searching on first use"
+        x, y = target
+        cell = int(x) * self.height + int(y)
+        field = self.fields.get(cell)
+        if field != None:
+            self.fields.move_to_end(cell)
+            return field
+        field = self._search(cell)
+        self.fields[cell] = field
+        self.fieldsBuilt += 1
+        if len(self.fields) > self.maxFields:
+            self.fields.popitem(last=False)
+        return field
+
+    def getDistance(self, pos, target):
+        """
+        Returns the maze distance from pos to target, a cell, or float('inf')
+        if it cannot be reached.  A pos between two cells, like a scared
+        ghost's, is half a move from each of them.
+        """
+        field = self.getField(target)
+        x, y = pos
+        if x == int(x) and y == int(y):
+            distance = field[int(x) * self.height + int(y)]
+            if distance == UNREACHABLE:
+                return float('inf')
+            return distance
+        x1, y1 = int(x), int(y)
+        x2, y2 = x1 + (x != x1), y1 + (y != y1)
+        distance = min(field[x1 * self.height + y1], field[x2 * self.height + y2])
+        if distance == UNREACHABLE:
+            return float('inf')
+        return distance + 0.5
+
+    def _search(self, target):
+        field = array.array('H', [UNREACHABLE]) * (self.width * self.height)
+        if not self.free[target]:
+            return field
+        neighbors = self.neighbors
+        field[target] = 0
+        queue = collections.deque([target])
+        while queue:
+            cell = queue.popleft()
+            distance = field[cell] + 1
+            for neighbor in neighbors[cell]:
+                if field[neighbor] == UNREACHABLE:
+                    field[neighbor] = distance
+                    queue.append(neighbor)
+        return field
+
+
+# Wall Grids whose fields are kept; beyond this the least recently used
+# Grid's fields are dropped
+MAX_GRIDS = 16
+
+_REGISTRY = collections.OrderedDict() # id(walls) -> (walls, DistanceFields)
+
+
+def getDistanceFields(walls):
+    """
+    Returns the DistanceFields of a wall Grid, shared by every caller with
+    the same Grid object (the walls of a Layout are shared, see layout.py).
+    """
+    entry = _REGISTRY.get(id(walls))
+    if entry != None and entry[0] is walls:
+        _REGISTRY.move_to_end(id(walls))
+        return entry[1]
+    fields = DistanceFields(walls)
+    _REGISTRY[id(walls)] = (walls, fields)
+    if len(_REGISTRY) > MAX_GRIDS:
+        _REGISTRY.popitem(last=False)
+    return fields
@@ -21,10 +21,15 @@
 # For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
 
 from util import *
+import bisect
 import time
 import os
 import traceback
 import sys
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 #######################
 # Parts worth reading #
@@ -79,11 +84,16 @@ class Configuration:
 
     The convention for positions, like a graph, is that (0,0) is the lower left corner, x increases
     horizontally and y increases vertically.  Therefore, north is the direction of increasing y, or (0,1).
+
+    Configurations are not changed once made, so AgentStates and the game
+    states that copy them share them, and the hash is computed once.
     """
+    __slots__ = ('pos', 'direction', '_hash')
 
     def __init__(self, pos, direction):
         self.pos = pos
         self.direction = direction
+        self._hash = None
 
     def getPosition(self):
         return (self.pos)
@@ -96,14 +106,26 @@ class Configuration:
         return x == int(x) and y == int(y)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if other == None:
             return False
         return (self.pos == other.pos and self.direction == other.direction)
 
     def __hash__(self):
-        x = hash(self.pos)
-        y = hash(self.direction)
-        return hash(x + 13 * y)
+        if self._hash == None:
+            x = hash(self.pos)
+            y = hash(self.direction)
+            self._hash = hash(x + 13 * y)
+        return self._hash
+
+    def __getstate__(self):
+        # String hashes differ between processes, so the hash is not pickled
+        return (self.pos, self.direction)
+
+    def __setstate__(self, state):
+        self.pos, self.direction = state
+        self._hash = None
 
     def __str__(self):
         return "(x,y)="+str(self.pos)+", "+str(self.direction)
@@ -128,6 +150,7 @@ class AgentState:
     """
     AgentStates hold the state of an agent (configuration, speed, scared, etc).
     """
+    __slots__ = ('start', 'configuration', 'isPacman', 'scaredTimer', 'numCarrying', 'numReturned')
 
     def __init__(self, startConfiguration, isPacman):
         self.start = startConfiguration
@@ -145,6 +168,8 @@ class AgentState:
             return "Ghost: " + str(self.configuration)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if other == None:
             return False
         return self.configuration == other.configuration and self.scaredTimer == other.scaredTimer
@@ -153,7 +178,10 @@ class AgentState:
         return hash(hash(self.configuration) + 13 * hash(self.scaredTimer))
 
     def copy(self):
-        state = AgentState(self.start, self.isPacman)
+        # The configurations are shared, as they are never changed
+        state = AgentState.__new__(AgentState)
+        state.start = self.start
+        state.isPacman = self.isPacman
         state.configuration = self.configuration
         state.scaredTimer = self.scaredTimer
         state.numCarrying = self.numCarrying
@@ -262,7 +290,7 @@ class Grid:
         return tuple(bits)
 
     def _cellIndexToPosition(self, index):
-        x = index / self.height
+        x = index // self.height
         y = index % self.height
         return x, y
 
@@ -293,6 +321,136 @@ class Grid:
         return bools
 
 
+# bytes.translate tables between cell values and the characters '0'/'1'
+_CELLS_TO_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+_DIGITS_TO_CELLS = bytes.maketrans(b'01', b'\x00\x01')
+_CELLS_TO_STR = bytes.maketrans(b'\x00\x01', b'FT')
+
+
+class ArrayGrid(Grid):
+    """
+    A Grid of booleans stored in one flat bytearray in column-major order, so
+    cell (x, y) is byte x * height + y.  grid[x] is a boolean memoryview of
+    column x, which keeps the grid[x][y] interface, reads returning False or
+    True, while count, asList, copy, __eq__, __hash__ and packBits run over
+    the whole array in C, with NumPy when it is installed.
+
+    Hashes and packBits agree with a list Grid holding the same cells.
+    """
+
+    def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+        if initialValue not in [False, True]:
+            raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        self.cells = bytearray([initialValue]) * (width * height)
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+        self._makeColumns()
+
+    def _makeColumns(self):
+        view = memoryview(self.cells).cast('?')
+        height = self.height
+        self.data = [view[x * height:(x + 1) * height]
+                     for x in range(self.width)]
+
+    def __setitem__(self, key, item):
+        self.data[key][:] = memoryview(bytes([bool(value) for value in item])).cast('?')
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['data']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._makeColumns()
+
+    def __str__(self):
+        characters = self.cells.translate(_CELLS_TO_STR)
+        return '\n'.join([characters[y::self.height].decode('ascii')
+                          for y in range(self.height - 1, -1, -1)])
+
+    def __eq__(self, other):
+        if other == None:
+            return False
+        if isinstance(other, ArrayGrid):
+            return self.height == other.height and self.cells == other.cells
+        return [[bool(cell) for cell in column] for column in self.data] == other.data
+
+    def __hash__(self):
+        if not self.cells:
+            return hash(0)
+        # The cells read backwards as binary digits are Grid.__hash__'s integer
+        return hash(int(self.cells.translate(_CELLS_TO_DIGITS)[::-1], 2))
+
+    def copy(self):
+        g = ArrayGrid.__new__(ArrayGrid)
+        g.CELLS_PER_INT = self.CELLS_PER_INT
+        g.width = self.width
+        g.height = self.height
+        g.cells = bytearray(self.cells)
+        g._makeColumns()
+        return g
+
+    def shallowCopy(self):
+        g = ArrayGrid.__new__(ArrayGrid)
+        g.CELLS_PER_INT = self.CELLS_PER_INT
+        g.width = self.width
+        g.height = self.height
+        g.cells = self.cells
+        g.data = self.data
+        return g
+
+    def count(self, item=True):
+        return self.cells.count(1 if item else 0)
+
+    def asList(self, key=True):
+        height = self.height
+        if numpy is not None:
+            cells = numpy.frombuffer(self.cells, dtype=numpy.uint8)
+            indices = numpy.flatnonzero(cells if key else cells == 0).tolist()
+            return [(index // height, index % height) for index in indices]
+        value = 1 if key else 0
+        find = self.cells.find
+        list = []
+        index = find(value)
+        while index >= 0:
+            list.append(divmod(index, height))
+            index = find(value, index + 1)
+        return list
+
+    def packBits(self):
+        """
+        Returns an efficient int list representation
+
+        (width, height, bitPackedInts...)
+        """
+        size = self.CELLS_PER_INT
+        digits = self.cells.translate(_CELLS_TO_DIGITS)
+        bits = [self.width, self.height]
+        for start in range(0, len(digits), size):
+            chunk = digits[start:start + size]
+            bits.append(int(chunk, 2) << (size - len(chunk)))
+        if len(digits) % size == 0:
+            bits.append(0)
+        return tuple(bits)
+
+    def _unpackBits(self, bits):
+        """
+        Fills in data from a bit-level representation
+        """
+        for packed in bits:
+            if packed < 0:
+                raise ValueError("must be a positive integer")
+        digits = ''.join([format(packed, '0%db' % self.CELLS_PER_INT)
+                          for packed in bits])
+        digits = digits[:len(self.cells)].encode('ascii')
+        self.cells[:len(digits)] = digits.translate(_DIGITS_TO_CELLS)
+
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1, 2)):
         return bitRep
@@ -349,11 +507,43 @@ class Actions:
         return (dx * speed, dy * speed)
     directionToVector = staticmethod(directionToVector)
 
+    def getMoveTable(walls):
+        """
+        Returns the legal directions and the legal neighbours, as lists in the
+        order of _directionsAsList, of every cell of a walls Grid not on its
+        border, indexed by x * walls.height + y; border cells have None.
+
+        The table is computed on first use and kept on the Grid, so walls must
+        not change afterwards, as the walls of a Layout never do.
+        """
+        table = getattr(walls, '_moveTable', None)
+        if table == None:
+            width, height = walls.width, walls.height
+            actions = [None] * (width * height)
+            neighbors = [None] * (width * height)
+            for x in range(1, width - 1):
+                for y in range(1, height - 1):
+                    cell = x * height + y
+                    actions[cell] = []
+                    neighbors[cell] = []
+                    for dir, (dx, dy) in Actions._directionsAsList:
+                        if not walls[x + dx][y + dy]:
+                            actions[cell].append(dir)
+                            neighbors[cell].append((x + dx, y + dy))
+            table = (actions, neighbors)
+            walls._moveTable = table
+        return table
+    getMoveTable = staticmethod(getMoveTable)
+
     def getPossibleActions(config, walls):
-        possible = []
         x, y = config.pos
         x_int, y_int = int(x + 0.5), int(y + 0.5)
+        if x == x_int and y == y_int:
+            possible = Actions.getMoveTable(walls)[0][x_int * walls.height + y_int]
+            if possible != None:
+                return possible[:]
 
+        possible = []
         # In between grid points, all agents must continue straight
         if (abs(x - x_int) + abs(y - y_int) > Actions.TOLERANCE):
             return [config.getDirection()]
@@ -372,6 +562,8 @@ class Actions:
     def getLegalNeighbors(position, walls):
         x, y = position
         x_int, y_int = int(x + 0.5), int(y + 0.5)
+        if 0 < x_int < walls.width - 1 and 0 < y_int < walls.height - 1:
+            return Actions.getMoveTable(walls)[1][x_int * walls.height + y_int][:]
         neighbors = []
         for dir, vec in Actions._directionsAsList:
             dx, dy = vec
@@ -394,18 +586,44 @@ class Actions:
 
 
 class GameStateData:
+    """
+    Successor states share data with their predecessor until it changes:
+
+      food and capsules are replaced, never modified, by the rule that eats
+      them (PacmanRules.consume);
+
+      agentStates starts as a new list of the predecessor's AgentStates and an
+      entry is copied by getMutableAgentState before its first change, so a
+      move copies only the agents it moves, scares or kills.
+
+    Treat the food Grid, the capsule list and the AgentStates of a state
+    handed to an agent as read-only; deepCopy gives a fully separate state.
+
+    The number of food dots and, once asked for, the sorted tuple of their
+    positions are kept along with the food Grid and updated by eatFood, so
+    neither needs a scan of the board.
+    """
+    __slots__ = ('food', 'capsules', 'agentStates', 'layout', '_eaten', 'score', 'scoreChange',
+                 '_copiedAgents', '_foodEaten', '_foodAdded', '_capsuleEaten', '_agentMoved',
+                 '_lose', '_win', '_numFood', '_foodList',
+                 # Zobrist key of the food and capsules, see transpositionTable.py
+                 '_boardKey')
 
     def __init__(self, prevState=None):
         """
         Generates a new data packet by copying information from its predecessor.
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates(prevState.agentStates)
+            self.food = prevState.food
+            self._numFood = prevState._numFood
+            self._foodList = prevState._foodList
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates[:]
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+        # Bit i is set once agentStates[i] is this state's own copy
+        self._copiedAgents = 0
 
         self._foodEaten = None
         self._foodAdded = None
@@ -418,6 +636,12 @@ class GameStateData:
     def deepCopy(self):
         state = GameStateData(self)
         state.food = self.food.deepCopy()
+        state._numFood = self._numFood
+        state._foodList = self._foodList
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates(self.agentStates)
+        state._copiedAgents = (1 << len(state.agentStates)) - 1
+        state._eaten = self._eaten[:]
         state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
@@ -425,12 +649,82 @@ class GameStateData:
         state._capsuleEaten = self._capsuleEaten
         return state
 
+    def pack(self):
+        """
+        Returns the state as a tuple of plain values, without the layout, that
+        pickles to a few hundred bytes; see unpack.
+        """
+        agents = tuple([(agentState.start.pos, agentState.configuration.pos, agentState.configuration.direction,
+                         agentState.isPacman, agentState.scaredTimer, agentState.numCarrying, agentState.numReturned)
+                        for agentState in self.agentStates])
+        return (self.food.packBits(), tuple(self.capsules), agents, tuple(self._eaten),
+                self.score, self._win, self._lose)
+
+    def unpack(packed, layout):
+        "Rebuilds a GameStateData packed by pack on the given layout"
+        foodBits, capsules, agents, eaten, score, win, lose = packed
+        state = GameStateData()
+        state.food = type(layout.food)(foodBits[0], foodBits[1], bitRepresentation=foodBits[2:])
+        state._numFood = state.food.count()
+        state._foodList = None
+        state.capsules = list(capsules)
+        state.agentStates = []
+        for start, pos, direction, isPacman, scaredTimer, numCarrying, numReturned in agents:
+            agentState = AgentState(Configuration(start, Directions.STOP), isPacman)
+            agentState.configuration = Configuration(pos, direction)
+            agentState.scaredTimer = scaredTimer
+            agentState.numCarrying = numCarrying
+            agentState.numReturned = numReturned
+            state.agentStates.append(agentState)
+        state._copiedAgents = (1 << len(state.agentStates)) - 1
+        state._eaten = list(eaten)
+        state.layout = layout
+        state.score = score
+        state._win = win
+        state._lose = lose
+        return state
+    unpack = staticmethod(unpack)
+
     def copyAgentStates(self, agentStates):
         copiedStates = []
         for agentState in agentStates:
             copiedStates.append(agentState.copy())
         return copiedStates
 
+    def getFoodList(self):
+        """
+        Returns the positions of the food dots as a tuple, in the order of
+        food.asList(), building it on the first call.
+        """
+        if self._foodList == None:
+            self._foodList = tuple(self.food.asList())
+        return self._foodList
+
+    def eatFood(self, position):
+        """
+        Removes the food dot at position, which must have one, without changing
+        the food Grid shared with the predecessor.
+        """
+        x, y = position
+        self.food = self.food.copy()
+        self.food[x][y] = False
+        self._numFood -= 1
+        foodList = self._foodList
+        if foodList != None:
+            i = bisect.bisect_left(foodList, position)
+            self._foodList = foodList[:i] + foodList[i + 1:]
+        self._foodEaten = position
+
+    def getMutableAgentState(self, agentIndex):
+        """
+        Returns the AgentState of an agent that this state may modify, copying
+        the one shared with the predecessor on first use.
+        """
+        if not self._copiedAgents >> agentIndex & 1:
+            self.agentStates[agentIndex] = self.agentStates[agentIndex].copy()
+            self._copiedAgents |= 1 << agentIndex
+        return self.agentStates[agentIndex]
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
@@ -519,6 +813,8 @@ class GameStateData:
         Creates an initial game state from a layout array (see layout.py).
         """
         self.food = layout.food.copy()
+        self._numFood = layout.totalFood
+        self._foodList = None
         #self.capsules = []
         self.capsules = layout.capsules[:]
         self.layout = layout
@@ -535,6 +831,7 @@ class GameStateData:
                     numGhosts += 1
             self.agentStates.append(AgentState(
                 Configuration(pos, Directions.STOP), isPacman))
+        self._copiedAgents = (1 << len(self.agentStates)) - 1
         self._eaten = [False for a in self.agentStates]
 
 
@@ -620,6 +917,8 @@ class Game:
                 self.unmute()
                 self._agentCrash(i, quiet=True)
                 return
+            if ("setMoveWarningTime" in dir(agent)):
+                agent.setMoveWarningTime(self.rules.getMoveWarningTime(i))
             if ("registerInitialState" in dir(agent)):
                 self.mute(i)
                 if self.catchExceptions:
@@ -776,3 +1075,62 @@ class Game:
                     self.unmute()
                     return
         self.display.finish()
+
+    def runHeadless(self, maxMoves=None):
+        """
+        A faster control loop for games that are not displayed.
+
+        Agents are handed views of the game state -- new GameStates sharing
+        its data copy-on-write, see GameStateData -- instead of deep copies,
+        their optional methods are looked up once per game, and the display is
+        never called.  There are no time limits and agent exceptions are not
+        caught, so use run for games with catchExceptions.
+
+        With maxMoves the game stops after that many moves of any agent even
+        if it is not over, e.g. to play a position out a few moves ahead.
+        """
+        self.numMoves = 0
+        agents = self.agents
+        numAgents = len(agents)
+        for i, agent in enumerate(agents):
+            if not agent:
+                print("Agent %d failed to load" % i, file=sys.stderr)
+                self._agentCrash(i, quiet=True)
+                return
+            if "setMoveWarningTime" in dir(agent):
+                agent.setMoveWarningTime(self.rules.getMoveWarningTime(i))
+            if "registerInitialState" in dir(agent):
+                self.mute(i)
+                agent.registerInitialState(self.state.__class__(self.state))
+                self.unmute()
+        observationFunctions = [getattr(agent, 'observationFunction', None) for agent in agents]
+        getActions = [agent.getAction for agent in agents]
+        process = self.rules.process
+        moveHistory = self.moveHistory
+        muteAgents = self.muteAgents
+
+        agentIndex = self.startingIndex
+        while not self.gameOver:
+            if maxMoves != None and len(moveHistory) >= maxMoves:
+                break
+            state = self.state
+            observation = state.__class__(state)
+            if muteAgents:
+                self.mute(agentIndex)
+            observationFunction = observationFunctions[agentIndex]
+            if observationFunction != None:
+                observation = observationFunction(observation)
+            action = getActions[agentIndex](observation)
+            if muteAgents:
+                self.unmute()
+
+            moveHistory.append((agentIndex, action))
+            self.state = state.generateSuccessor(agentIndex, action)
+            process(self.state, self)
+            agentIndex = (agentIndex + 1) % numAgents
+
+        for agentIndex, agent in enumerate(agents):
+            if "final" in dir(agent):
+                self.mute(agentIndex)
+                agent.final(self.state)
+                self.unmute()
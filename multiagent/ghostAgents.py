@@ -17,6 +17,7 @@ from game import Actions
 from game import Directions
 import random
 from util import manhattanDistance
+from distanceFields import getDistanceFields
 import util
 
 
@@ -48,12 +49,18 @@ class RandomGhost(GhostAgent):
 
 
 class DirectionalGhost(GhostAgent):
-    "A ghost that prefers to rush Pacman, or flee when scared."
+    """
+    A ghost that prefers to rush Pacman, or flee when scared.
 
-    def __init__(self, index, prob_attack=0.8, prob_scaredFlee=0.8):
+    Distances to Pacman are Manhattan distances, or with mazeDistance true
+    maze distances read from the layout's distance fields (distanceFields.py).
+    """
+
+    def __init__(self, index, prob_attack=0.8, prob_scaredFlee=0.8, mazeDistance=False):
         self.index = index
         self.prob_attack = prob_attack
         self.prob_scaredFlee = prob_scaredFlee
+        self.mazeDistance = mazeDistance
 
     def getDistribution(self, state):
         # Read variables from state
@@ -72,8 +79,13 @@ class DirectionalGhost(GhostAgent):
         pacmanPosition = state.getPacmanPosition()
 
         # Select best actions given the state
-        distancesToPacman = [manhattanDistance(
-            pos, pacmanPosition) for pos in newPositions]
+        if self.mazeDistance:
+            fields = getDistanceFields(state.getWalls())
+            distancesToPacman = [fields.getDistance(
+                pos, pacmanPosition) for pos in newPositions]
+        else:
+            distancesToPacman = [manhattanDistance(
+                pos, pacmanPosition) for pos in newPositions]
         if isScared:
             bestScore = max(distancesToPacman)
             bestProb = self.prob_scaredFlee
@@ -91,3 +103,10 @@ class DirectionalGhost(GhostAgent):
             dist[a] += (1-bestProb) / len(legalActions)
         dist.normalize()
         return dist
+
+
+class MazeDirectionalGhost(DirectionalGhost):
+    "A DirectionalGhost using maze distances, e.g. for -g MazeDirectionalGhost"
+
+    def __init__(self, index, prob_attack=0.8, prob_scaredFlee=0.8):
+        DirectionalGhost.__init__(self, index, prob_attack, prob_scaredFlee, mazeDistance=True)
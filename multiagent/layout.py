@@ -14,23 +14,39 @@
 
 from util import manhattanDistance
 from game import Grid
+from game import ArrayGrid
 import os
 import random
 from functools import reduce
 
 VISIBILITY_MATRIX_CACHE = {}
 
+# Grid class used for the walls and food of new layouts, see --gridBackend
+GRID_BACKENDS = {'list': Grid, 'array': ArrayGrid}
+GRID_BACKEND = 'list'
+
+# Parsed layouts shared by the whole process, by (layout text, grid backend);
+# see internLayout
+LAYOUT_REGISTRY = {}
+# Layouts found by getLayout, by (working directory, name, back, grid backend)
+_LAYOUTS_BY_NAME = {}
+
 
 class Layout:
     """
     A Layout manages the static information about the game board.
+
+    A layout is never changed once parsed: game states copy its food and
+    capsules before eating them, and the layouts returned by getLayout and
+    internLayout are shared by every game of the process.
     """
 
     def __init__(self, layoutText):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
-        self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        gridClass = GRID_BACKENDS[GRID_BACKEND]
+        self.walls = gridClass(self.width, self.height, False)
+        self.food = gridClass(self.width, self.height, False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
@@ -97,7 +113,8 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        # Layouts are not changed, so there is nothing to copy
+        return self
 
     def processLayoutText(self, layoutText):
         """
@@ -137,28 +154,62 @@ class Layout:
             self.numGhosts += 1
 
 
-def getLayout(name, back=2):
-    if name.endswith('.lay'):
-        layout = tryToLoad('layouts/' + name)
-        if layout == None:
-            layout = tryToLoad(name)
-    else:
-        layout = tryToLoad('layouts/' + name + '.lay')
-        if layout == None:
-            layout = tryToLoad(name + '.lay')
-    if layout == None and back >= 0:
-        curdir = os.path.abspath('.')
-        os.chdir('..')
-        layout = getLayout(name, back - 1)
-        os.chdir(curdir)
+def internLayout(layoutText):
+    """
+    Returns the shared Layout for a list of layout lines with the current
+    GRID_BACKEND, parsing it the first time.
+    """
+    key = (tuple(layoutText), GRID_BACKEND)
+    layout = LAYOUT_REGISTRY.get(key)
+    if layout == None:
+        layout = Layout(list(layoutText))
+        LAYOUT_REGISTRY[key] = layout
     return layout
 
 
+def getLayout(name, back=2):
+    """
+    Returns the Layout of the named .lay file, looked for in layouts/ and in
+    the working directory, then in up to back + 1 directories above it.  A
+    name is only looked up, read and parsed once per working directory.
+    """
+    key = (os.path.abspath('.'), name, back, GRID_BACKEND)
+    if key not in _LAYOUTS_BY_NAME:
+        _LAYOUTS_BY_NAME[key] = findLayout(name, back)
+    return _LAYOUTS_BY_NAME[key]
+
+
+def findLayout(name, back):
+    if not name.endswith('.lay'):
+        name = name + '.lay'
+    directory = os.curdir
+    for i in range(back + 2):
+        for fullname in [os.path.join(directory, 'layouts', name), os.path.join(directory, name)]:
+            layout = tryToLoad(fullname)
+            if layout != None:
+                return layout
+        directory = os.path.join(directory, os.pardir)
+    return None
+
+
+def preloadLayouts(names=None, back=2):
+    """
+    Parses layouts ahead of the games that use them, e.g. before starting
+    worker processes, and returns them.  names defaults to every .lay file
+    in the layouts directory.
+    """
+    if names == None:
+        names = []
+        if os.path.isdir('layouts'):
+            names = sorted([name for name in os.listdir('layouts') if name.endswith('.lay')])
+    return [getLayout(name, back) for name in names]
+
+
 def tryToLoad(fullname):
     if(not os.path.exists(fullname)):
         return None
     f = open(fullname)
     try:
-        return Layout([line.strip() for line in f])
+        return internLayout([line.strip() for line in f])
     finally:
         f.close()
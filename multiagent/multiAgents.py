@@ -14,9 +14,16 @@
 
 from util import manhattanDistance
 from game import Directions
-import random, util
+import random, util, time, math
+import ghostAgents
 
-from game import Agent
+from game import Agent, Actions, Game
+from transpositionTable import TranspositionTable, ZobristKeys, EXACT, LOWER, UPPER
+from parallelSearch import RootSplitter, RolloutPool
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 class ReflexAgent(Agent):
     """
@@ -71,7 +78,7 @@ class ReflexAgent(Agent):
         newPos = successorGameState.getPacmanPosition()
         newFood = successorGameState.getFood()
         newGhostStates = successorGameState.getGhostStates()
-        newFoodList = newFood.asList()
+        newFoodList = successorGameState.getFoodList()
         ghostPositions = successorGameState.getGhostPositions()
         newScaredTimes = [ghostState.scaredTimer for ghostState in newGhostStates]
 
@@ -129,10 +136,152 @@ class MultiAgentSearchAgent(Agent):
     is another abstract class.
     """
 
-    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2'):
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tableSize = '0', workers = '0'):
         self.index = 0 # Pacman is always agent index 0
         self.evaluationFunction = util.lookup(evalFn, globals())
+        # Evaluates a list of leaves at once, if the function has a batch version
+        self.batchEvaluationFunction = BATCH_EVALUATION_FUNCTIONS.get(self.evaluationFunction)
         self.depth = int(depth)
+        # Transposition table shared by the turns of a game, used when
+        # tableSize (its number of entries) is positive
+        self.tableSize = int(tableSize)
+        self.transpositionTable = None
+        if self.tableSize > 0:
+            self.transpositionTable = TranspositionTable(self.tableSize)
+        # Pool of processes searching the root's children, used when more
+        # than one worker is asked for
+        self.workers = int(workers)
+        self.rootSplitter = None
+        if self.workers > 1:
+            self.rootSplitter = RootSplitter(self, self.workers)
+        # Seconds per move of the agents that search anytime, or 'auto'
+        self.timeLimit = '0'
+        self.moveWarningTime = None
+
+    def setMoveWarningTime(self, seconds):
+        "Called by the Game with the time after which a move draws a warning"
+        self.moveWarningTime = seconds
+
+    def getMoveTime(self):
+        "Seconds an anytime search may spend on a move"
+        warningTime = self.moveWarningTime
+        if warningTime == None:
+            warningTime = DEFAULT_MOVE_TIME
+        if self.timeLimit == 'auto':
+            return TIME_MARGIN * warningTime
+        if self.moveWarningTime == None:
+            return float(self.timeLimit)
+        return min(float(self.timeLimit), TIME_MARGIN * warningTime)
+
+    def registerInitialState(self, gameState):
+        if self.transpositionTable != None:
+            self.transpositionTable.clear()
+
+    def final(self, gameState):
+        "Called at the end of a game; stops the root splitter's processes"
+        if self.rootSplitter != None:
+            self.rootSplitter.shutdown()
+
+    def startSearch(self):
+        "Called by getAction before searching from a new position"
+        if self.transpositionTable != None:
+            self.transpositionTable.newSearch()
+
+    def getChildValue(self, successorGameState, action, alpha=float('-inf'), beta=float('inf')):
+        """
+        Returns the value of the successor of the root after Pacman's action,
+        searched as getAction would, for RootSplitter's workers.
+        """
+        util.raiseNotDefined()
+
+    def getParallelAction(self, gameState, youngBrothersWait=False, margin=None):
+        """
+        Has the root splitter search the subtree below each of Pacman's moves
+        and picks the move as maxValue does: the last of the best.
+
+        With youngBrothersWait and a margin, values within margin of the
+        first move's may be bounds, and are searched again here with a full
+        window for the exact values that break ties.
+        """
+        self.startSearch()
+        actions = [action for action in gameState.getLegalActions(0) if action != Directions.STOP]
+        values = self.rootSplitter.getChildValues(gameState, actions, youngBrothersWait)
+        if youngBrothersWait and margin != None:
+            for i in range(1, len(actions)):
+                if abs(values[i] - values[0]) <= margin:
+                    values[i] = self.getChildValue(gameState.generateSuccessor(0, actions[i]), actions[i])
+        value = {'value': float('-inf'), 'action': Directions.STOP}
+        for action, childValue in zip(actions, values):
+            if value['value'] <= childValue:
+                value['value'] = childValue
+                value['action'] = action
+        return value['action']
+
+    def generateSuccessor(self, gameState, agentIndex, action):
+        """
+        gameState.generateSuccessor, also keeping the successor's Zobrist key
+        up to date when a transposition table is used.
+        """
+        successorGameState = gameState.generateSuccessor(agentIndex, action)
+        if self.transpositionTable != None:
+            self.transpositionTable.setSuccessorKey(gameState, successorGameState)
+        return successorGameState
+
+    def lookupTransposition(self, gameState, agentIndex, depth, alpha=float('-inf'), beta=float('inf'), margin=0):
+        """
+        Returns the node's transposition table key (None without a table) and
+        the stored {'value', 'action'} if it settles the node for the window
+        (alpha, beta), else None.
+
+        Bounds must lie strictly outside the window, as in the pruning tests
+        of AlphaBetaAgent, so that a hit returns what searching would; with a
+        margin, by more than margin.
+        """
+        table = self.transpositionTable
+        if table == None:
+            return None, None
+        key = table.getKey(gameState, agentIndex, depth)
+        entry = table.lookup(key, gameState)
+        if entry != None:
+            type, value, action = entry
+            if isSettled(type, value, alpha, beta, margin):
+                return key, {'value': value, 'action': action}
+        return key, None
+
+    def storeTransposition(self, key, gameState, depth, result, alpha=float('-inf'), beta=float('inf'), margin=None):
+        """
+        Stores the result of searching a node with the window (alpha, beta).
+        With a margin, values within margin of the window are stored as
+        bounds too.
+        """
+        if key == None:
+            return
+        value = result['value']
+        self.transpositionTable.store(key, depth, gameState, getEntryType(value, alpha, beta, margin),
+                                      value, result['action'])
+
+def getEntryType(value, alpha, beta, margin=None):
+    """
+    Whether a value searched with the window (alpha, beta) is EXACT or an
+    UPPER or LOWER bound.  With a margin, values within margin inside the
+    window count as bounds, as pruned expectimax may return them.
+    """
+    if margin == None:
+        if value < alpha:
+            return UPPER
+        if value > beta:
+            return LOWER
+        return EXACT
+    if alpha > float('-inf') and value <= alpha + margin:
+        return UPPER
+    if beta < float('inf') and value >= beta - margin:
+        return LOWER
+    return EXACT
+
+def isSettled(type, value, alpha, beta, margin=0):
+    "Whether a stored value settles a node searched with the window (alpha, beta)"
+    return (type == EXACT or (type == LOWER and value > beta + margin) or
+            (type == UPPER and value < alpha - margin))
 
 class MinimaxAgent(MultiAgentSearchAgent):
     """
@@ -162,10 +311,16 @@ class MinimaxAgent(MultiAgentSearchAgent):
         gameState.isLose():
         Returns whether or not the game state is a losing state
         """
+        if self.rootSplitter != None and self.depth > 0:
+            return self.getParallelAction(gameState)
+        self.startSearch()
         minimax = self.minimax(gameState, agentIndex=0, depth=self.depth)
 
         return minimax['action']
 
+    def getChildValue(self, successorGameState, action, alpha=float('-inf'), beta=float('inf')):
+        return self.minimax(successorGameState, 1, self.depth - 1, action)['value']
+
     def minimax(self, gameState, agentIndex=0, depth='2', action=Directions.STOP):
         agentIndex = agentIndex % gameState.getNumAgents()
 
@@ -176,10 +331,16 @@ class MinimaxAgent(MultiAgentSearchAgent):
             return {'value':self.evaluationFunction(gameState), 'action':action}
 
         else:
+            key, stored = self.lookupTransposition(gameState, agentIndex, depth)
+            if stored != None:
+                return stored
+
             if agentIndex==0: 
-                return self.maxValue(gameState,agentIndex,depth)
+                result = self.maxValue(gameState,agentIndex,depth)
             else: 
-                return self.minValue(gameState,agentIndex,depth)
+                result = self.minValue(gameState,agentIndex,depth)
+            self.storeTransposition(key, gameState, depth, result)
+            return result
 
     def maxValue(self, gameState, agentIndex, depth):
         value = {'value': float('-inf'), 'action': Directions.STOP}
@@ -190,7 +351,7 @@ class MinimaxAgent(MultiAgentSearchAgent):
             if action == Directions.STOP: 
                 continue
 
-            successorGameState = gameState.generateSuccessor(agentIndex, action) 
+            successorGameState = self.generateSuccessor(gameState, agentIndex, action) 
             successorMinMax = self.minimax(successorGameState, agentIndex+1, depth, action)
 
             if value['value'] <= successorMinMax['value']:
@@ -208,7 +369,7 @@ class MinimaxAgent(MultiAgentSearchAgent):
             if action == Directions.STOP: 
                 continue
 
-            successorGameState = gameState.generateSuccessor(agentIndex, action)
+            successorGameState = self.generateSuccessor(gameState, agentIndex, action)
             successorMinMax = self.minimax(successorGameState, agentIndex+1, depth, action)
 
             if value['value'] >= successorMinMax['value']:
@@ -217,52 +378,180 @@ class MinimaxAgent(MultiAgentSearchAgent):
 
         return value
 
+class SearchTimeout(Exception):
+    "Raised inside an anytime search when the move deadline has passed"
+    pass
+
+TIME_MARGIN = 0.8 # Fraction of the move warning time an anytime search may use
+DEFAULT_MOVE_TIME = 1.0 # Move warning time assumed outside of a Game
+MAX_ANYTIME_DEPTH = 64
+
 class AlphaBetaAgent(MultiAgentSearchAgent):
     """
     Your minimax agent with alpha-beta pruning (question 3)
+
+    With timeLimit set the agent searches anytime: it deepens one level at a
+    time from depth 1 until the deadline and plays the move of the deepest
+    finished search.  timeLimit is a number of seconds per move, or 'auto'
+    for TIME_MARGIN of the game's move warning time -- 24 seconds under the
+    default --timeout of 30, so 'auto' suits games run with a short
+    --timeout.  Each iteration tries
+    first the previous iteration's principal variation, then the killer moves
+    of the ply (the last two that caused a cutoff) and then the moves with the
+    best history score.
     """
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tableSize = '0', workers = '0', timeLimit = '0'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, tableSize, workers)
+        self.timeLimit = timeLimit
+        self.anytime = timeLimit == 'auto' or float(timeLimit) > 0
+        self.deadline = None
+        self.principalVariation = []
+        self.followPV = False
+        self.killers = {}
+        self.history = {}
+
     def getAction(self, gameState):
         """
         Returns the minimax action using self.depth and self.evaluationFunction
         """
+        if self.anytime:
+            return self.getAnytimeAction(gameState)
+        if self.rootSplitter != None and self.depth > 0:
+            return self.getParallelAction(gameState, youngBrothersWait=True)
         alpha = float('-inf')
         beta = float('inf')
+        self.startSearch()
         minimax = self.minimax(gameState, agentIndex=0, depth=self.depth, alpha=alpha, beta=beta)
         
         return minimax['action']
 
+    def getChildValue(self, successorGameState, action, alpha=float('-inf'), beta=float('inf')):
+        return self.minimax(successorGameState, 1, self.depth - 1, action, alpha, beta)['value']
+
+    def getAnytimeAction(self, gameState):
+        """
+        Searches to increasing depths until the deadline and returns the move
+        of the deepest search that finished.
+        """
+        self.deadline = time.time() + self.getMoveTime()
+        self.nodeCount = 0
+        self.startSearch()
+        self.principalVariation = []
+        self.killers = {}
+        for key in self.history:
+            self.history[key] //= 2 # Age the previous moves' history
+        legalMoves = [action for action in gameState.getLegalActions(0) if action != Directions.STOP]
+        action = legalMoves[0] if legalMoves else Directions.STOP
+        self.depthReached = 0
+        try:
+            for depth in range(1, MAX_ANYTIME_DEPTH + 1):
+                self.searchDepth = depth
+                self.followPV = True
+                self.depthCutoff = False
+                minimax = self.minimax(gameState, agentIndex=0, depth=depth)
+                action = minimax['action']
+                self.principalVariation = minimax.get('line', [action])
+                self.depthReached = depth
+                if not self.depthCutoff: # The whole game tree was searched
+                    break
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+        return action
+
+    def getPly(self, gameState, agentIndex, depth):
+        "Number of moves between the root and a node of the current iteration"
+        return (self.searchDepth - 1 - depth) * gameState.getNumAgents() + agentIndex
+
+    def getOrderedActions(self, gameState, agentIndex, depth):
+        """
+        The legal actions of a node, in the order an anytime search tries them.
+        """
+        legalMoves = gameState.getLegalActions(agentIndex)
+        if not self.anytime or len(legalMoves) < 2:
+            return legalMoves
+        ply = self.getPly(gameState, agentIndex, depth)
+        position = gameState.data.agentStates[agentIndex].getPosition()
+        history = self.history
+        ordered = sorted(legalMoves, key=lambda action: -history.get((agentIndex, position, action), 0))
+        first = []
+        # Until the first leaf the search is on the previous iteration's
+        # principal variation, which it follows first
+        if self.followPV and ply < len(self.principalVariation):
+            first.append(self.principalVariation[ply])
+        first.extend(self.killers.get(ply, []))
+        front = []
+        for action in first:
+            if action in legalMoves and action not in front:
+                front.append(action)
+        return front + [action for action in ordered if action not in front]
+
+    def recordCutoff(self, gameState, agentIndex, depth, action):
+        "Updates the killer moves and history after action caused a cutoff"
+        if not self.anytime:
+            return
+        killers = self.killers.setdefault(self.getPly(gameState, agentIndex, depth), [])
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[2:]
+        key = (agentIndex, gameState.data.agentStates[agentIndex].getPosition(), action)
+        self.history[key] = self.history.get(key, 0) + (depth + 1) ** 2
+
     def minimax(self, gameState, agentIndex=0, depth='0', action=Directions.STOP, alpha=float('-inf'), beta=float('inf')):
         agentIndex = agentIndex % gameState.getNumAgents()
 
         if agentIndex == 0: 
             depth = depth-1
 
+        if self.deadline != None:
+            self.nodeCount += 1
+            if self.nodeCount % 64 == 0 and time.time() > self.deadline:
+                raise SearchTimeout()
+
         if gameState.isWin() or gameState.isLose() or depth == -1:
+            if self.anytime:
+                self.followPV = False
+                if depth == -1 and not (gameState.isWin() or gameState.isLose()):
+                    self.depthCutoff = True
             return {'value':self.evaluationFunction(gameState), 'action':action}
-        
+
+        key, stored = self.lookupTransposition(gameState, agentIndex, depth, alpha, beta)
+        if stored != None:
+            self.followPV = False
+            # The stored subtree is not a whole game tree, so an anytime
+            # search must not stop deepening on its account
+            self.depthCutoff = True
+            return stored
+
         if agentIndex==0: 
-            return self.maxValue(gameState,agentIndex,depth, alpha, beta)
+            result = self.maxValue(gameState,agentIndex,depth, alpha, beta)
         else: 
-            return self.minValue(gameState,agentIndex,depth, alpha, beta)    
+            result = self.minValue(gameState,agentIndex,depth, alpha, beta)
+        self.storeTransposition(key, gameState, depth, result, alpha, beta)
+        return result
 
     def maxValue(self, gameState, agentIndex, depth, alpha, beta):
 
         value = {'value':float('-inf'), 'action':Directions.STOP}
 
-        legalMoves = gameState.getLegalActions(agentIndex)
+        legalMoves = self.getOrderedActions(gameState, agentIndex, depth)
 
         for action in legalMoves:
 
             if action == Directions.STOP: continue
 
-            successorGameState = gameState.generateSuccessor(agentIndex, action)
+            successorGameState = self.generateSuccessor(gameState, agentIndex, action)
             successorMinMax = self.minimax(successorGameState, agentIndex+1, depth, action, alpha, beta)
 
             if value['value'] <= successorMinMax['value']:
                 value['value'] = successorMinMax['value']
                 value['action'] = action
+                if self.anytime:
+                    value['line'] = [action] + successorMinMax.get('line', [])
 
             if value['value'] > beta: 
+                self.recordCutoff(gameState, agentIndex, depth, action)
                 return value
             alpha = max(alpha, value['value'])
 
@@ -271,31 +560,107 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
     def minValue(self, gameState, agentIndex, depth, alpha, beta):
 
         value = {'value':float('inf'), 'action':Directions.STOP}
-        legalMoves = gameState.getLegalActions(agentIndex)
+        legalMoves = self.getOrderedActions(gameState, agentIndex, depth)
 
         for action in legalMoves:
 
             if action == Directions.STOP: continue
 
-            successorGameState = gameState.generateSuccessor(agentIndex, action)
+            successorGameState = self.generateSuccessor(gameState, agentIndex, action)
 
             successorMinMax = self.minimax(successorGameState, agentIndex+1, depth, action, alpha, beta)
 
             if value['value'] >= successorMinMax['value']:
                 value['value'] = successorMinMax['value']
                 value['action'] = action
+                if self.anytime:
+                    value['line'] = [action] + successorMinMax.get('line', [])
 
             if value['value'] < alpha: 
+                self.recordCutoff(gameState, agentIndex, depth, action)
                 return value
             beta = min(beta, value['value'])
 
         return value
 
+STAR_EPSILON = 1e-6 # Values this close count as equal in pruned expectimax
+
 class ExpectimaxAgent(MultiAgentSearchAgent):
     """
       Your expectimax agent (question 4)
+
+      By default the ghosts are modeled as choosing uniformly at random.  With
+      ghostModel, the name of a GhostAgent class in ghostAgents.py such as
+      DirectionalGhost, each ghost's moves are weighted by that class's
+      getDistribution instead.
+
+      prune=1 turns on Star1 pruning: a chance node stops expanding once the
+      values of its remaining moves, bounded by the bounds of the evaluation
+      function (EVALUATION_BOUNDS), can no longer bring it inside the search
+      window.  The chosen action does not change.
+
+      With a ghost model or pruning, the values of chance nodes reached more
+      than once in a search are memoised, by the transposition table when
+      there is one (tableSize).
     """
 
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tableSize = '0', workers = '0',
+                 ghostModel = '', prune = '0'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, tableSize, workers)
+        self.ghostModel = ghostModel
+        self.ghostModels = {}
+        self.prune = bool(int(prune))
+        self.evaluationBounds = None
+        if self.prune:
+            self.evaluationBounds = EVALUATION_BOUNDS.get(self.evaluationFunction)
+            if self.evaluationBounds == None:
+                raise Exception('Pruning needs an evaluation function with bounds, one of: ' +
+                                ', '.join(sorted([f.__name__ for f in EVALUATION_BOUNDS])))
+        self.bounds = (float('-inf'), float('inf'))
+        if self.ghostModel or self.prune:
+            self.batchEvaluationFunction = None
+        # Without a transposition table, the weighted search memoises its
+        # chance nodes for one search, keyed like the table's entries
+        self.zobrist = ZobristKeys()
+        self.chanceValues = {}
+
+    def startSearch(self):
+        MultiAgentSearchAgent.startSearch(self)
+        self.chanceValues = {}
+
+    def generateSuccessor(self, gameState, agentIndex, action):
+        successorGameState = MultiAgentSearchAgent.generateSuccessor(self, gameState, agentIndex, action)
+        if self.transpositionTable == None and self.isWeighted():
+            self.zobrist.setSuccessorKey(gameState, successorGameState)
+        return successorGameState
+
+    def lookupChanceValue(self, gameState, agentIndex, depth, alpha=float('-inf'), beta=float('inf')):
+        """
+        Returns the memo key of a chance node (None with a transposition
+        table, which memoises them itself) and the stored {'value', 'action'}
+        if it settles the node for the window (alpha, beta), else None.
+        Values are stored relative to the score, as in the table.
+        """
+        if self.transpositionTable != None:
+            return None, None
+        key = (self.zobrist.getKey(gameState), agentIndex, depth)
+        entry = self.chanceValues.get(key)
+        if entry != None:
+            type, value = entry[0], entry[1] + gameState.getScore()
+            if isSettled(type, value, alpha, beta, STAR_EPSILON):
+                return key, {'value': value, 'action': Directions.STOP}
+        return key, None
+
+    def storeChanceValue(self, key, gameState, result, alpha=float('-inf'), beta=float('inf')):
+        if key != None:
+            value = result['value']
+            self.chanceValues[key] = (getEntryType(value, alpha, beta, STAR_EPSILON),
+                                      value - gameState.getScore())
+
+    def isWeighted(self):
+        "Whether the search needs weightedExpectimax rather than expectimax"
+        return bool(self.ghostModel) or self.prune
+
     def getAction(self, gameState):
         """
         Returns the expectimax action using self.depth and self.evaluationFunction
@@ -303,10 +668,128 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         All ghosts should be modeled as choosing uniformly at random from their
         legal moves.
         """
+        if self.rootSplitter != None and self.depth > 0:
+            return self.getParallelAction(gameState, youngBrothersWait=self.prune, margin=STAR_EPSILON)
         depth = self.depth
+        self.startSearch()
+        if self.isWeighted():
+            self.setBounds(gameState, depth)
+            return self.weightedExpectimax(gameState, 0, depth)['action']
         minimax = self.expectimax(gameState, 0, depth, Directions.STOP)
         return minimax['action']
 
+    def getChildValue(self, successorGameState, action, alpha=float('-inf'), beta=float('inf')):
+        if self.isWeighted():
+            self.setBounds(successorGameState, self.depth - 1)
+            return self.weightedExpectimax(successorGameState, 1, self.depth - 1, alpha, beta)['value']
+        return self.expectimax(successorGameState, 1, self.depth - 1, action)['value']
+
+    def setBounds(self, gameState, depth):
+        "Bounds the values of the leaves of a search of depth from gameState"
+        if self.prune:
+            self.bounds = self.evaluationBounds(gameState, depth)
+
+    def getGhostWeights(self, gameState, agentIndex):
+        """
+        Returns a list of (action, weight) for the ghost's legal moves with a
+        positive probability, in the order of getLegalActions.  Weights are
+        probabilities relative to the largest, so that the moves of a uniform
+        ghost weigh exactly 1 and their weighted average is minValue's.
+        """
+        actions = gameState.getLegalActions(agentIndex)
+        if not self.ghostModel:
+            return [(action, 1.0) for action in actions]
+        model = self.ghostModels.get(agentIndex)
+        if model == None:
+            model = getattr(ghostAgents, self.ghostModel)(agentIndex)
+            self.ghostModels[agentIndex] = model
+        distribution = model.getDistribution(gameState)
+        largest = max([distribution[action] for action in actions])
+        return [(action, distribution[action] / largest) for action in actions if distribution[action] > 0]
+
+    def weightedExpectimax(self, gameState, agentIndex, depth, alpha=float('-inf'), beta=float('inf')):
+        """
+        expectimax with the ghosts' moves weighted by getGhostWeights
+        and, with pruning, a search window (alpha, beta): a value below alpha
+        is an upper bound and a value above beta a lower bound of the node's.
+        """
+        agentIndex = agentIndex % gameState.getNumAgents()
+
+        if agentIndex == 0:
+            depth = depth - 1
+
+        if gameState.isWin() or gameState.isLose() or depth == -1:
+            return {'value': self.evaluationFunction(gameState), 'action': Directions.STOP}
+
+        key, stored = self.lookupTransposition(gameState, agentIndex, depth, alpha, beta, STAR_EPSILON)
+        if stored != None:
+            return stored
+
+        if agentIndex == 0:
+            result = self.weightedMaxValue(gameState, depth, alpha, beta)
+        else:
+            chanceKey, stored = self.lookupChanceValue(gameState, agentIndex, depth, alpha, beta)
+            if stored != None:
+                return stored
+            result = self.chanceValue(gameState, agentIndex, depth, alpha, beta)
+            self.storeChanceValue(chanceKey, gameState, result, alpha, beta)
+        self.storeTransposition(key, gameState, depth, result, alpha, beta, STAR_EPSILON)
+        return result
+
+    def weightedMaxValue(self, gameState, depth, alpha, beta):
+        value = {'value': float('-inf'), 'action': Directions.STOP}
+        for action in gameState.getLegalActions(0):
+            if action == Directions.STOP:
+                continue
+            successorGameState = self.generateSuccessor(gameState, 0, action)
+            window = max(alpha, value['value'])
+            childValue = self.weightedExpectimax(successorGameState, 1, depth, window, beta)['value']
+            # A value within STAR_EPSILON of the window may be a bound; ties
+            # are broken as in maxValue, on the exact value
+            if self.prune and abs(childValue - window) <= STAR_EPSILON:
+                childValue = self.weightedExpectimax(successorGameState, 1, depth)['value']
+            if value['value'] <= childValue:
+                value['value'] = childValue
+                value['action'] = action
+            if value['value'] > beta:
+                return value
+        return value
+
+    def chanceValue(self, gameState, agentIndex, depth, alpha, beta):
+        """
+        The expected value of a ghost's move.  With pruning, each move is
+        searched with the window outside which the node's value is settled
+        whatever the moves after it are worth (Star1).
+
+        The node is pruned only when its bounds are more than STAR_EPSILON
+        outside the window.  Rounding in the children's windows then leaves
+        a value that is a bound within STAR_EPSILON of the window, where
+        weightedMaxValue searches it again.
+        """
+        lower, upper = self.bounds
+        weights = self.getGhostWeights(gameState, agentIndex)
+        total = sum([weight for action, weight in weights])
+        weightedSum = 0.0
+        for i, (action, weight) in enumerate(weights):
+            # Weight of the moves after this one, exactly 0 for the last
+            remaining = sum([w for a, w in weights[i + 1:]])
+            childAlpha, childBeta = float('-inf'), float('inf')
+            if self.prune:
+                childAlpha = (alpha * total - weightedSum - remaining * upper) / weight
+                childBeta = (beta * total - weightedSum - remaining * lower) / weight
+            successorGameState = self.generateSuccessor(gameState, agentIndex, action)
+            childValue = self.weightedExpectimax(successorGameState, agentIndex + 1, depth,
+                                                 childAlpha, childBeta)['value']
+            weightedSum += weight * childValue
+            if self.prune:
+                bound = (weightedSum + remaining * upper) / total
+                if bound < alpha - STAR_EPSILON:
+                    return {'value': bound, 'action': Directions.STOP}
+                bound = (weightedSum + remaining * lower) / total
+                if bound > beta + STAR_EPSILON:
+                    return {'value': bound, 'action': Directions.STOP}
+        return {'value': weightedSum / total, 'action': Directions.STOP}
+
     def expectimax(self, gameState, agentIndex, depth, action):
         agentIndex = agentIndex % gameState.getNumAgents()
 
@@ -315,11 +798,63 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
 
         if gameState.isWin() or gameState.isLose() or depth == -1:
             return {'value':self.evaluationFunction(gameState), 'action':action}
-        
-        if agentIndex==0: 
-            return self.maxValue(gameState,agentIndex,depth)
+
+        key, stored = self.lookupTransposition(gameState, agentIndex, depth)
+        if stored != None:
+            return stored
+
+        if agentIndex == 0 and depth == 0 and self.batchEvaluationFunction != None:
+            result = self.lastRoundValue(gameState)
+        elif agentIndex==0: 
+            result = self.maxValue(gameState,agentIndex,depth)
         else: 
-            return self.minValue(gameState,agentIndex,depth)  
+            result = self.minValue(gameState,agentIndex,depth)
+        self.storeTransposition(key, gameState, depth, result)
+        return result
+
+    def lastRoundValue(self, gameState):
+        """
+        The expectimax value of Pacman's last move and the ghosts' replies,
+        as maxValue would find it, but with the leaves collected first and
+        given to the batch evaluation function together.
+        """
+        leaves = []
+        tree = self.collectLeaves(gameState, 0, leaves)
+        values = self.batchEvaluationFunction(leaves)
+        return self.foldLeaves(tree, values)
+
+    def collectLeaves(self, gameState, agentIndex, leaves):
+        """
+        Generates the successors of the round from agentIndex on, adding the
+        leaves to leaves, and returns the tree: a leaf's index in leaves, or
+        (agentIndex, [(action, subtree), ...]).
+        """
+        if agentIndex == gameState.getNumAgents() or gameState.isWin() or gameState.isLose():
+            leaves.append(gameState)
+            return len(leaves) - 1
+        children = []
+        for action in gameState.getLegalActions(agentIndex):
+            if agentIndex == 0 and action == Directions.STOP:
+                continue
+            successorGameState = self.generateSuccessor(gameState, agentIndex, action)
+            children.append((action, self.collectLeaves(successorGameState, agentIndex + 1, leaves)))
+        return (agentIndex, children)
+
+    def foldLeaves(self, tree, values):
+        "The {'value', 'action'} of a tree from collectLeaves, given the leaves' values"
+        if type(tree) == int:
+            return {'value': values[tree], 'action': Directions.STOP}
+        agentIndex, children = tree
+        if agentIndex == 0:
+            value = {'value': float('-inf'), 'action': Directions.STOP}
+            for action, child in children:
+                childValue = self.foldLeaves(child, values)['value']
+                if value['value'] <= childValue:
+                    value['value'] = childValue
+                    value['action'] = action
+            return value
+        successorCosts = [self.foldLeaves(child, values)['value'] for action, child in children]
+        return {'value': sum(successorCosts) / float(len(successorCosts)), 'action': Directions.STOP}
 
     def maxValue(self, gameState, agentIndex, depth):
 
@@ -330,7 +865,7 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             if action == Directions.STOP: 
                 continue
 
-            successorGameState = gameState.generateSuccessor(agentIndex, action) 
+            successorGameState = self.generateSuccessor(gameState, agentIndex, action) 
             successorExpectiMax = self.expectimax(successorGameState, agentIndex+1, depth, action)
 
             if value['value'] <= successorExpectiMax['value']:
@@ -344,13 +879,269 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         successorCosts = []
 
         for action in actions:
-            successorGameState = gameState.generateSuccessor(agentIndex, action)
+            successorGameState = self.generateSuccessor(gameState, agentIndex, action)
 
             value = self.expectimax(successorGameState, agentIndex+1, depth, action)
             successorCosts.append(value['value'])
 
         return {'value': sum(successorCosts) / float(len(successorCosts)), 'action': Directions.STOP}
 
+ROLLOUTS_PER_TASK = 8 # Rollouts a parallel MCTSAgent sends a worker at a time
+
+class MCTSNode:
+    """
+    A node of MCTSAgent's tree: the position after a sequence of Pacman's
+    moves, whatever the ghosts did in between.  Pacman's moves alone decide
+    where he is, so the node's legal moves are known, while the ghosts' moves
+    are sampled anew on every visit.
+    """
+    def __init__(self):
+        self.children = {}
+        self.visits = 0
+        self.totalValue = 0.0
+
+class RolloutRules:
+    "Game rules for rollouts, which end when Pacman wins or loses"
+
+    def process(self, state, game):
+        if state.isWin() or state.isLose():
+            game.gameOver = True
+
+class RolloutAgent(Agent):
+    """
+    The Pacman of MCTSAgent's rollouts, cheap enough to play many moves: he
+    never stops, turns back only at a dead end, keeps off cells next to an
+    unscared ghost when he can and eats an adjacent dot when there is one.
+    """
+    def getAction(self, gameState):
+        configuration = gameState.getPacmanState().configuration
+        actions = [action for action in gameState.getLegalActions(0) if action != Directions.STOP]
+        if not actions:
+            return Directions.STOP
+        reverse = Directions.REVERSE[configuration.direction]
+        actions = [action for action in actions if action != reverse] or actions
+        x, y = configuration.pos
+        dangers = [ghostState.getPosition() for ghostState in gameState.getGhostStates()
+                   if ghostState.scaredTimer == 0]
+        safe = []
+        for action in actions:
+            position = Actions.getSuccessor((x, y), action)
+            if min([manhattanDistance(position, danger) for danger in dangers] + [2]) > 1:
+                safe.append(action)
+        actions = safe or actions
+        food = gameState.getFood()
+        eating = []
+        for action in actions:
+            nextX, nextY = Actions.getSuccessor((x, y), action)
+            if food[int(nextX)][int(nextY)]:
+                eating.append(action)
+        return random.choice(eating or actions)
+
+class MCTSAgent(MultiAgentSearchAgent):
+    """
+    Monte Carlo tree search with UCT.
+
+    Each iteration walks down the tree of Pacman's moves, taking the child
+    with the highest upper confidence bound: its mean value, scaled to [0, 1]
+    by the range of values seen, plus exploration * sqrt(ln N / n).  The
+    ghosts' moves in between are sampled from ghostModel, a GhostAgent class
+    in ghostAgents.py.  The walk adds one node to the tree and plays the game
+    on from it for rolloutDepth rounds on the headless engine
+    (Game.runHeadless), with RolloutAgent as Pacman.  The evaluation function
+    of where the rollout stops -- or the score, if the game ended -- is added
+    to the value of each node of the walk.  Pacman plays the move visited
+    most.
+
+    Each move gets a budget of iterations, or without it timeLimit seconds,
+    0.2 by default.  timeLimit=auto gives it TIME_MARGIN of the game's move
+    warning time instead (see getMoveTime), which is 24 seconds under the
+    default --timeout of 30.  The subtree below the move played is kept for the
+    next turn.  With workers > 1 the rollouts are played by a RolloutPool,
+    a batch of ROLLOUTS_PER_TASK per worker at a time.  Until its rollout
+    returns, a walk counts as the lowest value seen (a virtual loss), which
+    sends the other walks of its batch elsewhere.
+
+    > python pacman.py -p MCTSAgent -a timeLimit=0.5,workers=4 -l originalClassic
+    """
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', tableSize = '0', workers = '0',
+                 timeLimit = '0.2', iterations = '0', rolloutDepth = '10', exploration = '1.4',
+                 ghostModel = 'RandomGhost'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, tableSize, workers)
+        self.timeLimit = timeLimit
+        self.iterations = int(iterations)
+        self.rolloutDepth = int(rolloutDepth)
+        self.exploration = float(exploration)
+        self.ghostModel = ghostModel
+        self.ghostModels = {}
+        self.rolloutAgent = RolloutAgent()
+        self.rolloutRules = RolloutRules()
+        self.root = None
+        self.rootPosition = None
+        self.rootSplitter = None
+        self.rolloutPool = None
+        if self.workers > 1:
+            self.rolloutPool = RolloutPool(self, self.workers)
+
+    def __getstate__(self):
+        # Copies for worker processes leave the tree and the pool behind
+        state = self.__dict__.copy()
+        state['root'] = None
+        state['rolloutPool'] = None
+        return state
+
+    def registerInitialState(self, gameState):
+        MultiAgentSearchAgent.registerInitialState(self, gameState)
+        self.root = None
+
+    def final(self, gameState):
+        "Called at the end of a game; drops the tree and stops the rollout pool"
+        MultiAgentSearchAgent.final(self, gameState)
+        self.root = None
+        if self.rolloutPool != None:
+            self.rolloutPool.shutdown()
+
+    def getAction(self, gameState):
+        """
+        Returns the most visited of Pacman's moves after searching for the
+        move's budget
+        """
+        root = self.root
+        # Reuse the subtree of the last move played, unless the game went
+        # somewhere else
+        if root == None or gameState.getPacmanPosition() != self.rootPosition:
+            root = MCTSNode()
+        self.search(root, gameState)
+        if not root.children:
+            self.root = None
+            return Directions.STOP
+        action = max(root.children, key=lambda action: (root.children[action].visits,
+                                                        root.children[action].totalValue / root.children[action].visits))
+        self.root = root.children[action]
+        self.rootPosition = Actions.getSuccessor(gameState.getPacmanPosition(), action)
+        return action
+
+    def getGhostModel(self, agentIndex):
+        model = self.ghostModels.get(agentIndex)
+        if model == None:
+            model = getattr(ghostAgents, self.ghostModel)(agentIndex)
+            self.ghostModels[agentIndex] = model
+        return model
+
+    def getValue(self, gameState):
+        "The value of the end of a walk or rollout: the score of a finished game"
+        if gameState.isWin() or gameState.isLose():
+            return gameState.getScore()
+        return self.evaluationFunction(gameState)
+
+    def search(self, root, gameState):
+        "Runs the move's iterations from gameState, whose node is root"
+        deadline = None
+        if self.iterations <= 0:
+            deadline = time.time() + self.getMoveTime()
+        batchSize = 1
+        if self.rolloutPool != None:
+            batchSize = self.workers * ROLLOUTS_PER_TASK
+        value = self.getValue(gameState)
+        self.valueRange = [value, value]
+        self.iterationCount = 0
+        while True:
+            size = batchSize
+            if deadline == None:
+                size = min(batchSize, self.iterations - self.iterationCount)
+                if size <= 0:
+                    break
+            elif self.iterationCount > 0 and time.time() >= deadline:
+                break
+            walks = [self.walk(root, gameState) for i in range(size)]
+            values = self.evaluateLeaves([state for path, state, virtualValue in walks])
+            for (path, state, virtualValue), value in zip(walks, values):
+                for node in path:
+                    node.totalValue += value - virtualValue
+                self.valueRange[0] = min(self.valueRange[0], value)
+                self.valueRange[1] = max(self.valueRange[1], value)
+            self.iterationCount += size
+
+    def walk(self, root, gameState):
+        """
+        Walks from root to a new node and returns the nodes passed, the
+        state reached and the virtual loss counted for them.
+        """
+        virtualValue = self.valueRange[0]
+        node, state = root, gameState
+        root.visits += 1
+        root.totalValue += virtualValue
+        path = [root]
+        while not (state.isWin() or state.isLose()):
+            actions = [action for action in state.getLegalActions(0) if action != Directions.STOP]
+            untried = [action for action in actions if action not in node.children]
+            if untried:
+                action = random.choice(untried)
+                node.children[action] = MCTSNode()
+            elif actions:
+                action = self.selectAction(node)
+            else:
+                break
+            state = self.playRound(state, action)
+            node = node.children[action]
+            node.visits += 1
+            node.totalValue += virtualValue
+            path.append(node)
+            if untried:
+                break
+        return path, state, virtualValue
+
+    def selectAction(self, node):
+        "The action of the child of node with the highest upper confidence bound"
+        low, high = self.valueRange
+        scale = high - low or 1.0
+        logVisits = math.log(node.visits)
+        bestBound, bestAction = float('-inf'), None
+        for action, child in node.children.items():
+            bound = ((child.totalValue / child.visits - low) / scale +
+                     self.exploration * math.sqrt(logVisits / child.visits))
+            if bound > bestBound:
+                bestBound, bestAction = bound, action
+        return bestAction
+
+    def playRound(self, gameState, action):
+        "Plays Pacman's action and a move of each ghost sampled from the ghost model"
+        state = gameState.generateSuccessor(0, action)
+        for agentIndex in range(1, state.getNumAgents()):
+            if state.isWin() or state.isLose():
+                break
+            state = state.generateSuccessor(agentIndex, self.getGhostModel(agentIndex).getAction(state))
+        return state
+
+    def evaluateLeaves(self, gameStates):
+        "Values of the states reached by walks, playing out the unfinished games"
+        values = [None] * len(gameStates)
+        unfinished = []
+        for i, gameState in enumerate(gameStates):
+            if gameState.isWin() or gameState.isLose():
+                values[i] = gameState.getScore()
+            else:
+                unfinished.append(i)
+        states = [gameStates[i] for i in unfinished]
+        if self.rolloutPool != None:
+            rolloutValues = self.rolloutPool.getRolloutValues(states)
+        else:
+            rolloutValues = [self.rollout(state) for state in states]
+        for i, value in zip(unfinished, rolloutValues):
+            values[i] = value
+        return values
+
+    def rollout(self, gameState):
+        """
+        Plays gameState, with Pacman to move, on for rolloutDepth rounds on
+        the headless engine and returns the value where it stops
+        """
+        agents = [self.rolloutAgent] + [self.getGhostModel(agentIndex)
+                                        for agentIndex in range(1, gameState.getNumAgents())]
+        game = Game(agents, None, self.rolloutRules)
+        game.state = gameState
+        game.runHeadless(maxMoves=self.rolloutDepth * len(agents))
+        return self.getValue(game.state)
+
 def betterEvaluationFunction(currentGameState):
     """
     Your extreme ghost-hunting, pellet-nabbing, food-gobbling, unstoppable
@@ -363,7 +1154,7 @@ def betterEvaluationFunction(currentGameState):
         return float("-inf")
 
     score = scoreEvaluationFunction(currentGameState)
-    newFoodList = currentGameState.getFood().asList()
+    newFoodList = currentGameState.getFoodList()
     newPos = currentGameState.getPacmanPosition()
     minDistanceFood = float("+inf")
 
@@ -376,5 +1167,97 @@ def betterEvaluationFunction(currentGameState):
     score -= 4 * len(capsulelocations)
     return score
     
+def scoreEvaluationBatch(gameStates):
+    "scoreEvaluationFunction of each of a list of states"
+    return [gameState.getScore() for gameState in gameStates]
+
+def getFoodDistances(foodList, positions):
+    """
+    The Manhattan distance from each of positions to the nearest food in
+    foodList, computed for all the positions at once with NumPy if present.
+    """
+    if numpy is not None and len(foodList) * len(positions) > 64:
+        food = numpy.array(foodList, dtype=numpy.int64)
+        cells = numpy.array(positions, dtype=numpy.int64)
+        distances = numpy.abs(food[None, :, :] - cells[:, None, :]).sum(2).min(1)
+        return [int(distance) for distance in distances]
+    return [min([manhattanDistance(foodPos, position) for foodPos in foodList])
+            for position in positions]
+
+def betterEvaluationBatch(gameStates):
+    """
+    betterEvaluationFunction of each of a list of states, giving the same values.
+
+    Leaves of one search share their food until Pacman eats, and Pacman has
+    only a few positions among them, so the food distance is computed once per
+    food Grid for all of Pacman's positions over it instead of once per leaf.
+    """
+    values = [None] * len(gameStates)
+    positionsByFood = {}
+    for i, gameState in enumerate(gameStates):
+        if gameState.isWin():
+            values[i] = float("+inf")
+        elif gameState.isLose():
+            values[i] = float("-inf")
+        else:
+            # The states are alive until the end, so the Grids' ids are unique
+            positions = positionsByFood.setdefault(id(gameState.getFood()), {})
+            positions.setdefault(gameState.getPacmanPosition(), []).append(i)
+    for positions in positionsByFood.values():
+        foodList = gameStates[next(iter(positions.values()))[0]].getFoodList()
+        distances = getFoodDistances(foodList, list(positions))
+        for distance, indices in zip(distances, positions.values()):
+            for i in indices:
+                gameState = gameStates[i]
+                score = scoreEvaluationFunction(gameState)
+                score -= 2 * distance
+                score -= 4 * len(foodList)
+                score -= 4 * len(gameState.getCapsules())
+                values[i] = score
+    return values
+
+def scoreEvaluationBounds(gameState, depth):
+    """
+    Returns (lower, upper) bounds on scoreEvaluationFunction over the states
+    reached from gameState by up to depth moves of Pacman and the ghosts'
+    replies, from the score changes of the rules in pacman.py.
+
+    Pacman and a ghost get at most 2 * depth + 1 closer in that time, so
+    capsules and ghosts further away cannot change the score.
+    """
+    score = gameState.getScore()
+    numFood = gameState.getNumFood()
+    pacmanPosition = gameState.getPacmanPosition()
+    ghostStates = gameState.getGhostStates()
+    capsules = [capsule for capsule in gameState.getCapsules()
+                if manhattanDistance(capsule, pacmanPosition) <= depth]
+    nearGhosts = [ghostState for ghostState in ghostStates
+                  if manhattanDistance(ghostState.getPosition(), pacmanPosition) <= 2 * depth + 1]
+    # A ghost can be eaten once while scared, and again after each capsule
+    ghostsEaten = len([ghostState for ghostState in nearGhosts if ghostState.scaredTimer > 0])
+    ghostsEaten += len(ghostStates) * min(depth, len(capsules))
+    # Each of Pacman's moves costs 1 and gains at most 10 for a dot
+    upper = score + 9 * min(depth, numFood) + 200 * ghostsEaten
+    if numFood <= depth:
+        upper += 500
+    lower = score - depth
+    # Pacman can die to a near ghost that is or may become unscared, or to
+    # an eaten one coming back from its start
+    if ghostsEaten > 0 or [ghostState for ghostState in nearGhosts if ghostState.scaredTimer <= depth + 1]:
+        lower -= 500
+    return lower, upper
+
 # Abbreviation
-better = betterEvaluationFunction
\ No newline at end of file
+better = betterEvaluationFunction
+
+# Batch versions of the evaluation functions, used by ExpectimaxAgent to
+# evaluate the leaves of its last round together
+BATCH_EVALUATION_FUNCTIONS = {
+    scoreEvaluationFunction: scoreEvaluationBatch,
+    betterEvaluationFunction: betterEvaluationBatch,
+}
+
+# Bounds of the evaluation functions, needed by ExpectimaxAgent's pruning
+EVALUATION_BOUNDS = {
+    scoreEvaluationFunction: scoreEvaluationBounds,
+}
\ No newline at end of file
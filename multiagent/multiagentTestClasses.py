@@ -345,8 +345,12 @@ class PacmanGameTreeTest(testClasses.TestCase):
                            altDepthActions, partialPlyBugActions)
         # check return codes and assign grades
         disp = self.question.getDisplay()
-        stats = run(lay, self.layout_name, pac, [DirectionalGhost(
-            i + 1) for i in range(2)], disp, name=self.alg)
+        GameState.trackExplored()
+        try:
+            stats = run(lay, self.layout_name, pac, [DirectionalGhost(
+                i + 1) for i in range(2)], disp, name=self.alg)
+        finally:
+            GameState.stopTrackingExplored()
         if stats['timeouts'] > 0:
             self.addMessage('Agent timed out on smallClassic.  No credit')
             return self.testFail(grades)
@@ -395,8 +399,12 @@ class PacmanGameTreeTest(testClasses.TestCase):
             ourPacOptions = {}
         pac = PolyAgent(self.seed, multiAgents, ourPacOptions, self.depth)
         disp = self.question.getDisplay()
-        run(lay, self.layout_name, pac, [DirectionalGhost(
-            i + 1) for i in range(2)], disp, name=self.alg)
+        GameState.trackExplored()
+        try:
+            run(lay, self.layout_name, pac, [DirectionalGhost(
+                i + 1) for i in range(2)], disp, name=self.alg)
+        finally:
+            GameState.stopTrackingExplored()
         (optimalActions, altDepthActions, partialPlyBugActions) = pac.getTraces()
         # recover traces and record to file
         handle = open(filePath, 'w')
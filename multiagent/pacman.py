@@ -43,6 +43,7 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import Configuration
 from util import nearestPoint
 from util import manhattanDistance
 import util
@@ -58,6 +59,38 @@ import os
 ###################################################
 
 
+class ExploredStates:
+    """
+    The distinct GameStates passed through generateSuccessor while tracking is
+    on (see GameState.trackExplored).  At most limit states are kept; once
+    full, each further state not already recorded is only counted, so len()
+    becomes an upper bound instead of growing memory without end.
+    """
+
+    def __init__(self, limit=None):
+        self.states = set()
+        self.limit = limit
+        self.overflow = 0
+
+    def add(self, state):
+        if self.limit is None or len(self.states) < self.limit:
+            self.states.add(state)
+        elif state not in self.states:
+            self.overflow += 1
+
+    def __len__(self):
+        return len(self.states) + self.overflow
+
+    def __iter__(self):
+        return iter(self.states)
+
+    def __contains__(self, state):
+        return state in self.states
+
+
+EXPLORED_LIMIT = 1000000  # States kept by GameState.trackExplored by default
+
+
 class GameState:
     """
     A GameState specifies the full game state, including the food, capsules,
@@ -72,17 +105,37 @@ class GameState:
 
     Note that in classic Pacman, Pacman is always agent 0.
     """
+    __slots__ = ('data',)
 
     ####################################################
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
-    explored = set()
+    # static variable keeps track of which states have been expanded, an
+    # ExploredStates while the autograder tracks them and None otherwise: adding
+    # a state hashes its whole food grid, so games don't pay for it by default
+    explored = None
+
+    def trackExplored(limit=EXPLORED_LIMIT):
+        """
+        Starts recording the states passed through generateSuccessor.
+        """
+        GameState.explored = ExploredStates(limit)
+    trackExplored = staticmethod(trackExplored)
+
+    def stopTrackingExplored():
+        GameState.explored = None
+    stopTrackingExplored = staticmethod(stopTrackingExplored)
 
     def getAndResetExplored():
-        tmp = GameState.explored.copy()
-        GameState.explored = set()
+        """
+        Returns the states recorded since the last call (empty when tracking is
+        off) and starts a new record.
+        """
+        tmp = GameState.explored
+        if tmp == None:
+            return ExploredStates()
+        GameState.explored = ExploredStates(tmp.limit)
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
@@ -121,7 +174,8 @@ class GameState:
         if agentIndex == 0:
             state.data.scoreChange += -TIME_PENALTY  # Penalty for waiting around
         else:
-            GhostRules.decrementTimer(state.data.agentStates[agentIndex])
+            GhostRules.decrementTimer(
+                state.data.getMutableAgentState(agentIndex))
 
         # Resolve multi-agent effects
         GhostRules.checkDeath(state, agentIndex)
@@ -129,8 +183,9 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.explored != None:
+            GameState.explored.add(self)
+            GameState.explored.add(state)
         return state
 
     def getLegalPacmanActions(self):
@@ -183,7 +238,14 @@ class GameState:
         return self.data.capsules
 
     def getNumFood(self):
-        return self.data.food.count()
+        return self.data._numFood
+
+    def getFoodList(self):
+        """
+        Returns a tuple of the positions (x,y) of the remaining food, the same
+        as getFood().asList() but without scanning the board.
+        """
+        return self.data.getFoodList()
 
     def getFood(self):
         """
@@ -240,6 +302,20 @@ class GameState:
         state.data = self.data.deepCopy()
         return state
 
+    def pack(self):
+        """
+        Returns a compact, picklable description of the state without its
+        layout, for sending states to other processes.
+        """
+        return self.data.pack()
+
+    def unpack(packed, layout):
+        "Rebuilds the GameState returned by pack on the given layout"
+        state = GameState()
+        state.data = GameStateData.unpack(packed, layout)
+        return state
+    unpack = staticmethod(unpack)
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
@@ -359,7 +435,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.getMutableAgentState(0)
 
         # Update Configuration
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
@@ -379,21 +455,20 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
-            state.data._foodEaten = position
-            # TODO: cache numFood?
+            state.data.eatFood(position)
             numFood = state.getNumFood()
             if numFood == 0 and not state.data._lose:
                 state.data.scoreChange += 500
                 state.data._win = True
         # Eat capsule
         if(position in state.getCapsules()):
-            state.data.capsules.remove(position)
+            state.data.capsules = [
+                capsule for capsule in state.data.capsules if capsule != position]
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.getMutableAgentState(
+                    index).scaredTimer = SCARED_TIME
     consume = staticmethod(consume)
 
 
@@ -425,7 +500,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.getMutableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0:
             speed /= 2.0
@@ -437,8 +512,9 @@ class GhostRules:
     def decrementTimer(ghostState):
         timer = ghostState.scaredTimer
         if timer == 1:
-            ghostState.configuration.pos = nearestPoint(
-                ghostState.configuration.pos)
+            configuration = ghostState.configuration
+            ghostState.configuration = Configuration(
+                nearestPoint(configuration.pos), configuration.direction)
         ghostState.scaredTimer = max(0, timer - 1)
     decrementTimer = staticmethod(decrementTimer)
 
@@ -449,12 +525,14 @@ class GhostRules:
                 ghostState = state.data.agentStates[index]
                 ghostPosition = ghostState.configuration.getPosition()
                 if GhostRules.canKill(pacmanPosition, ghostPosition):
-                    GhostRules.collide(state, ghostState, index)
+                    GhostRules.collide(
+                        state, state.data.getMutableAgentState(index), index)
         else:
             ghostState = state.data.agentStates[agentIndex]
             ghostPosition = ghostState.configuration.getPosition()
             if GhostRules.canKill(pacmanPosition, ghostPosition):
-                GhostRules.collide(state, ghostState, agentIndex)
+                GhostRules.collide(
+                    state, state.data.getMutableAgentState(agentIndex), agentIndex)
     checkDeath = staticmethod(checkDeath)
 
     def collide(state, ghostState, agentIndex):
@@ -462,7 +540,8 @@ class GhostRules:
             state.data.scoreChange += 200
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
-            # Added for first-person
+            # Added for first-person; _eaten may be shared with the predecessor
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
@@ -554,6 +633,13 @@ def readCommand(argv):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--gridBackend', dest='gridBackend', type='choice',
+                      choices=sorted(layout.GRID_BACKENDS),
+                      help=default('Storage for the wall and food grids: list (lists of bools) or array (one bytearray)'),
+                      default='list')
+    parser.add_option('-j', '--jobs', dest='jobs', type='int',
+                      help=default('Number of processes to play the games in; games played in parallel are not displayed'),
+                      default=1)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -565,6 +651,7 @@ def readCommand(argv):
         random.seed('cs188')
 
     # Choose a layout
+    layout.GRID_BACKEND = options.gridBackend
     args['layout'] = layout.getLayout(options.layout)
     if args['layout'] == None:
         raise Exception("The layout " + options.layout + " cannot be found")
@@ -606,6 +693,7 @@ def readCommand(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['jobs'] = options.jobs
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
@@ -672,38 +760,109 @@ def replayGame(layout, actions, display):
     display.finish()
 
 
-def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30):
+# The number of processes runGames plays its games in when it is not given
+# jobs, e.g. for the autograder's --jobs option
+JOBS = 1
+
+
+def recordGame(layout, game, i):
+    import time
+    import pickle
+    fname = ('recorded-game-%d' % (i + 1)) + \
+        '-'.join([str(t) for t in time.localtime()[1:6]])
+    f = open(fname, 'wb')
+    components = {'layout': layout, 'actions': game.moveHistory}
+    pickle.dump(components, f)
+    f.close()
+
+
+def playGame(game, catchExceptions):
+    """
+    Plays a game made by newGame: with Game.runHeadless when it has a null
+    display (e.g. -q) and exceptions need not be caught, else with Game.run.
+    """
+    display = game.display
+    if not catchExceptions and 'checkNullDisplay' in dir(display) and display.checkNullDisplay():
+        game.runHeadless()
+    else:
+        game.run()
+
+
+def _runSeededGame(layout, pacman, ghosts, seed, catchExceptions, timeout):
+    """
+    Plays one game in a worker process of runGames, without a display, and
+    returns the finished Game.  The agents and display stay in the worker.
+    """
+    import textDisplay
+    random.seed(seed)
+    rules = ClassicGameRules(timeout)
+    game = rules.newGame(layout, pacman, ghosts,
+                         textDisplay.NullGraphics(), False, catchExceptions)
+    playGame(game, catchExceptions)
+    game.agents = None
+    game.display = None
+    return game
+
+
+def runParallelGames(layout, pacman, ghosts, seeds, catchExceptions, timeout, jobs):
+    """
+    Plays a game for each of seeds in a pool of jobs processes and returns
+    them in order.  Each game gets a copy of the agents and is not displayed.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(jobs) as executor:
+        futures = [executor.submit(_runSeededGame, layout, pacman, ghosts,
+                                   seed, catchExceptions, timeout)
+                   for seed in seeds]
+        return [future.result() for future in futures]
+
+
+def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30, jobs=None):
+    """
+    Plays numGames games, the first numTraining of them quietly, and prints
+    the statistics of the others.
+
+    With jobs > 1 the training games are still played here, since the agent
+    learns from them, and the rest are played by runParallelGames.  Each of
+    the other games starts from its own random seed, drawn after training,
+    so the games are the same whatever the number of jobs and with -f the
+    same in every run.
+    """
     import __main__
     __main__.__dict__['_display'] = display
 
+    if jobs == None:
+        jobs = JOBS
     rules = ClassicGameRules(timeout)
     games = []
 
-    for i in range(numGames):
-        beQuiet = i < numTraining
-        if beQuiet:
-                # Suppress output and graphics
-            import textDisplay
-            gameDisplay = textDisplay.NullGraphics()
-            rules.quiet = True
-        else:
-            gameDisplay = display
-            rules.quiet = False
+    for i in range(numTraining):
+        # Suppress output and graphics
+        import textDisplay
+        rules.quiet = True
         game = rules.newGame(layout, pacman, ghosts,
-                             gameDisplay, beQuiet, catchExceptions)
-        game.run()
-        if not beQuiet:
-            games.append(game)
-
+                             textDisplay.NullGraphics(), True, catchExceptions)
+        playGame(game, catchExceptions)
         if record:
-            import time
-            import pickle
-            fname = ('recorded-game-%d' % (i + 1)) + \
-                '-'.join([str(t) for t in time.localtime()[1:6]])
-            f = file(fname, 'w')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            pickle.dump(components, f)
-            f.close()
+            recordGame(layout, game, i)
+
+    seeds = [random.getrandbits(32) for i in range(numGames - numTraining)]
+    if jobs > 1 and len(seeds) > 1:
+        games = runParallelGames(layout, pacman, ghosts, seeds,
+                                 catchExceptions, timeout, jobs)
+        for i, game in enumerate(games):
+            if record:
+                recordGame(layout, game, numTraining + i)
+    else:
+        rules.quiet = False
+        for i, seed in enumerate(seeds):
+            random.seed(seed)
+            game = rules.newGame(layout, pacman, ghosts,
+                                 display, False, catchExceptions)
+            playGame(game, catchExceptions)
+            games.append(game)
+            if record:
+                recordGame(layout, game, numTraining + i)
 
     if (numGames-numTraining) > 0:
         scores = [game.state.getScore() for game in games]
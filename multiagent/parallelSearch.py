@@ -0,0 +1,138 @@
+# parallelSearch.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Process pools for the adversarial search agents in multiAgents.py.
+
+With root splitting the subtree below each of Pacman's moves is searched by a
+separate process of a ProcessPoolExecutor.  Each worker receives a copy of the
+agent and the layout once, when the pool starts; after that a task is only the
+packed successor state (GameState.pack, a few hundred bytes) and the search
+window.  A RolloutPool plays out MCTSAgent's leaves in the same way.
+"""
+
+import copy
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+# The worker's copy of the agent and the game layout, set by _initializeWorker
+_workerAgent = None
+_workerLayout = None
+
+
+def _initializeWorker(agent, layout):
+    global _workerAgent, _workerLayout
+    _workerAgent = agent
+    _workerLayout = layout
+    agent.workers = 0
+    if agent.tableSize > 0:
+        from transpositionTable import TranspositionTable
+        agent.transpositionTable = TranspositionTable(agent.tableSize)
+
+
+def _searchChild(packedState, action, alpha, beta):
+    import pacman
+    successorGameState = pacman.GameState.unpack(packedState, _workerLayout)
+    _workerAgent.startSearch()
+    return _workerAgent.getChildValue(successorGameState, action, alpha, beta)
+
+
+def _playOut(packedStates, seed):
+    import pacman
+    # Seeded by the caller, or every worker would play the same rollouts
+    random.seed(seed)
+    return [_workerAgent.rollout(pacman.GameState.unpack(packedState, _workerLayout))
+            for packedState in packedStates]
+
+
+class RootSplitter:
+    """
+    A pool of worker processes that search the root's children for an agent.
+    The pool is started on first use and restarted when the layout changes.
+    """
+
+    def __init__(self, agent, workers):
+        self.agent = agent
+        self.workers = workers
+        self.executor = None
+        self.layoutText = None
+
+    def __getstate__(self):
+        # The pool belongs to this process; a copy starts its own when used
+        state = self.__dict__.copy()
+        state['executor'] = None
+        state['layoutText'] = None
+        return state
+
+    def getExecutor(self, layout):
+        if self.executor == None or self.layoutText != layout.layoutText:
+            self.shutdown()
+            # Workers get the agent without its pool and transposition table
+            agent = copy.copy(self.agent)
+            agent.rootSplitter = None
+            agent.transpositionTable = None
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_initializeWorker,
+                                                initargs=(agent, layout))
+            self.layoutText = layout.layoutText
+        return self.executor
+
+    def shutdown(self):
+        if self.executor != None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def getChildValues(self, gameState, actions, youngBrothersWait=False):
+        """
+        Returns the values of the successors of gameState after each of
+        Pacman's actions, in order.
+
+        With youngBrothersWait the first successor is searched here with a full
+        window and the others in the pool with alpha raised to its value, which
+        keeps alpha-beta's pruning at the root.  Values below that alpha are
+        then upper bounds, which never change the root's choice.
+        """
+        executor = self.getExecutor(gameState.data.layout)
+        successors = [gameState.generateSuccessor(0, action) for action in actions]
+        alpha, values = float('-inf'), []
+        if youngBrothersWait and actions:
+            alpha = self.agent.getChildValue(successors[0], actions[0])
+            values.append(alpha)
+            successors, actions = successors[1:], actions[1:]
+        futures = [executor.submit(_searchChild, successor.pack(), action, alpha, float('inf'))
+                   for successor, action in zip(successors, actions)]
+        return values + [future.result() for future in futures]
+
+
+class RolloutPool(RootSplitter):
+    """
+    A pool of worker processes that play out positions for an MCTSAgent,
+    started like a RootSplitter's.
+    """
+
+    def getRolloutValues(self, gameStates):
+        """
+        Returns agent.rollout of each of gameStates, in order.  The states are
+        split into one task per worker.
+        """
+        if not gameStates:
+            return []
+        executor = self.getExecutor(gameStates[0].data.layout)
+        packedStates = [gameState.pack() for gameState in gameStates]
+        size = (len(packedStates) + self.workers - 1) // self.workers
+        futures = [executor.submit(_playOut, packedStates[i:i + size], random.getrandbits(32))
+                   for i in range(0, len(packedStates), size)]
+        values = []
+        for future in futures:
+            values.extend(future.result())
+        return values
@@ -0,0 +1,73 @@
+# test_multiAgents.py
+# -------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Checks that the options of ExpectimaxAgent do not change its moves.
+
+> python -m unittest test_multiAgents
+"""
+
+import os
+import random
+import unittest
+
+import layout
+import pacman
+from multiAgents import ExpectimaxAgent
+
+LAYOUTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'search', 'layouts')
+
+
+def getPositions(name, number, seed=0):
+    "Returns number positions reached by random moves on a layout, none of them over"
+    board = layout.getLayout(os.path.join(LAYOUTS, name + '.lay'))
+    generator = random.Random(seed)
+    positions = []
+    while len(positions) < number:
+        state = pacman.GameState()
+        state.initialize(board, 2)
+        for move in range(generator.randint(0, 60)):
+            if state.isWin() or state.isLose():
+                break
+            agentIndex = move % state.getNumAgents()
+            state = state.generateSuccessor(agentIndex, generator.choice(state.getLegalActions(agentIndex)))
+        if not (state.isWin() or state.isLose()):
+            positions.append(state)
+    return positions
+
+
+class ExpectimaxAgreementTest(unittest.TestCase):
+
+    def assertSameActions(self, name, number, depth):
+        agents = {
+            'uniform model': ExpectimaxAgent(depth=depth, ghostModel='RandomGhost'),
+            'pruned': ExpectimaxAgent(depth=depth, prune='1'),
+            'pruned, uniform model': ExpectimaxAgent(depth=depth, ghostModel='RandomGhost', prune='1'),
+        }
+        plain = ExpectimaxAgent(depth=depth)
+        for i, state in enumerate(getPositions(name, number)):
+            action = plain.getAction(state)
+            for agentName, agent in agents.items():
+                self.assertEqual(agent.getAction(state), action,
+                                 '%s agent, position %d of %s' % (agentName, i, name))
+
+    def testSmallClassic(self):
+        self.assertSameActions('smallClassic', 40, '2')
+
+    def testTrickyClassic(self):
+        self.assertSameActions('trickyClassic', 10, '3')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+# transpositionTable.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Zobrist hashing and a fixed size transposition table for the adversarial
+search agents in multiAgents.py.
+
+A position's key XORs one random 64 bit number per feature: each remaining
+food dot and capsule, and each agent's (position, scared timer) -- plus the
+direction for ghosts, which cannot reverse.  The food and capsule part is kept
+on the state and updated incrementally by setSuccessorKey from what the move
+ate, so it is never rebuilt from the whole grid during a search.
+"""
+
+import random
+
+# Entry types: the stored value is exact, a lower bound or an upper bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class ZobristKeys:
+    """
+    Random 64 bit keys, drawn on first use from a seeded generator so that
+    the keys of a feature are the same in every run.
+    """
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        self.keys = {}
+
+    def getFeatureKey(self, feature):
+        key = self.keys.get(feature)
+        if key == None:
+            key = self.random.getrandbits(64)
+            self.keys[feature] = key
+        return key
+
+    def getBoardKey(self, state):
+        "Key of the food and capsules of a GameState"
+        data = state.data
+        key = getattr(data, '_boardKey', None)
+        if key == None:
+            key = 0
+            for position in state.getFoodList():
+                key ^= self.getFeatureKey(('food', position))
+            for position in state.getCapsules():
+                key ^= self.getFeatureKey(('capsule', position))
+            data._boardKey = key
+        return key
+
+    def setSuccessorKey(self, state, successor):
+        """
+        Derives the board key of successor, generated from state by one move,
+        from the key of state.
+        """
+        key = self.getBoardKey(state)
+        data = successor.data
+        if data._foodEaten != None:
+            key ^= self.getFeatureKey(('food', data._foodEaten))
+        if data._capsuleEaten != None:
+            key ^= self.getFeatureKey(('capsule', data._capsuleEaten))
+        data._boardKey = key
+
+    def getKey(self, state):
+        "Key of a GameState: its board key and every agent's position and timer"
+        key = self.getBoardKey(state)
+        for index, agentState in enumerate(state.data.agentStates):
+            configuration = agentState.configuration
+            if index == 0:
+                feature = (0, configuration.pos)
+            else:
+                feature = (index, configuration.pos,
+                           configuration.direction, agentState.scaredTimer)
+            key ^= self.getFeatureKey(feature)
+        return key
+
+
+class TranspositionTable:
+    """
+    Search results for positions, stored in a fixed number of slots.
+
+    An entry is found by the position's Zobrist key combined with the agent to
+    move and the remaining depth, so a result is only reused for a search of
+    the same depth and gives the same value as searching again.  When two
+    entries fall in the same slot the one searched deeper is kept, except that
+    entries left from earlier turns (see newSearch) are always replaced.
+
+    Values are stored relative to the position's score.  This makes them
+    independent of the path that reached the position, provided the
+    evaluation function is the score plus a function of the position, as
+    scoreEvaluationFunction and betterEvaluationFunction are.
+
+    size bounds the memory used: each slot costs about 120 bytes once filled.
+    """
+
+    def __init__(self, size, seed=0):
+        if size <= 0:
+            raise ValueError('A transposition table needs at least one slot')
+        self.size = size
+        self.zobrist = ZobristKeys(seed)
+        self.clear()
+
+    def clear(self):
+        "Empties the table, e.g. at the start of a game"
+        self.slots = [None] * self.size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def newSearch(self):
+        "Marks the entries stored so far as belonging to an earlier search"
+        self.generation += 1
+
+    def setSuccessorKey(self, state, successor):
+        self.zobrist.setSuccessorKey(state, successor)
+
+    def getKey(self, state, agentIndex, depth):
+        "Key of a search node: the position, the agent to move and the remaining depth"
+        return self.zobrist.getKey(state) ^ self.zobrist.getFeatureKey(('turn', agentIndex, depth))
+
+    def lookup(self, key, state):
+        """
+        Returns (type, value, action) stored for the node with this key, or
+        None.  state is the node's GameState.
+        """
+        self.probes += 1
+        entry = self.slots[key % self.size]
+        if entry == None or entry[0] != key:
+            return None
+        self.hits += 1
+        return entry[3], entry[4] + state.getScore(), entry[5]
+
+    def store(self, key, depth, state, type, value, action):
+        slot = key % self.size
+        entry = self.slots[slot]
+        if entry == None or entry[2] != self.generation or depth >= entry[1]:
+            self.slots[slot] = (key, depth, self.generation, type,
+                                value - state.getScore(), action)
+            self.stores += 1
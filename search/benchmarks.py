@@ -0,0 +1,137 @@
+# benchmarks.py
+# -------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Micro-benchmarks for the search data structures and algorithms.
+
+> python benchmarks.py -b heap -n 10000,100000,1000000
+> python benchmarks.py -b memory --puzzleSize 3 --scramble 80
+
+Run with --help for the list of benchmarks.
+"""
+
+import multiprocessing
+import optparse
+import random
+import sys
+import time
+import util
+try:
+    import resource
+except ImportError: # Not available on Windows
+    resource = None
+
+def timePerOperation(function, operations):
+    "Runs function() once and returns the average time per operation in microseconds"
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1e6 / max(operations, 1)
+
+def benchmarkHeap(options):
+    """
+    Compares push, pop and update (decrease-key) cost of util.PriorityQueue and
+    util.IndexedPriorityQueue.  PriorityQueue.update scans the whole heap, so
+    it is only timed on a sample of options.updates keys.
+    """
+    print('%-22s %9s %10s %10s %12s' % ('queue', 'items', 'push us', 'pop us', 'update us'))
+    for size in options.sizes:
+        rng = random.Random(size)
+        priorities = [rng.random() for i in range(size)]
+        updates = rng.sample(range(size), min(options.updates, size))
+        for queueClass in (util.PriorityQueue, util.IndexedPriorityQueue):
+            queue = queueClass()
+            def push():
+                for item, priority in enumerate(priorities):
+                    queue.push(item, priority)
+            def update():
+                for item in updates:
+                    queue.update(item, priorities[item] - 1)
+            def pop():
+                while not queue.isEmpty():
+                    queue.pop()
+            pushCost = timePerOperation(push, size)
+            updateCost = timePerOperation(update, len(updates))
+            popCost = timePerOperation(pop, size)
+            print('%-22s %9d %10.3f %10.3f %12.3f' % (queueClass.__name__, size, pushCost, popCost, updateCost))
+
+def _solvePuzzle(arguments):
+    """
+    Solves one sliding puzzle in a fresh worker process and returns the plan
+    length, nodes generated, elapsed time and the worker's peak RSS in KB.
+    """
+    functionName, numbers = arguments
+    import eightpuzzle, search
+    problem = eightpuzzle.EightPuzzleSearchProblem(eightpuzzle.EightPuzzleState(numbers))
+    start = time.perf_counter()
+    plan = getattr(search, functionName)(problem, eightpuzzle.puzzleManhattanHeuristic)
+    elapsed = time.perf_counter() - start
+    peakRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    return len(plan), problem._searchStats.generated, elapsed, peakRss
+
+def benchmarkMemoryBounded(options):
+    """
+    Runs aStarSearch, iterativeDeepeningAStarSearch and recursiveBestFirstSearch
+    on the same scrambled sliding puzzles with the Manhattan heuristic.  Every
+    search runs in its own spawned process so the reported peak RSS belongs to
+    that search alone.
+    """
+    import eightpuzzle
+    random.seed(options.seed)
+    puzzles = [eightpuzzle.createRandomEightPuzzle(options.scramble, options.puzzleSize) for i in range(options.puzzles)]
+    context = multiprocessing.get_context('spawn')
+    print('%-32s %7s %6s %10s %12s %12s' % ('search', 'puzzle', 'cost', 'generated', 'nodes/s', 'peak RSS KB'))
+    for functionName in ('aStarSearch', 'iterativeDeepeningAStarSearch', 'recursiveBestFirstSearch'):
+        for number, puzzle in enumerate(puzzles):
+            numbers = [tile for row in puzzle.cells for tile in row]
+            with context.Pool(1) as pool:
+                cost, generated, elapsed, peakRss = pool.apply(_solvePuzzle, ((functionName, numbers),))
+            print('%-32s %7d %6d %10d %12.0f %12s' % (functionName, number, cost, generated,
+                                                      generated / max(elapsed, 1e-9), peakRss if peakRss else 'n/a'))
+
+BENCHMARKS = {
+    'heap': benchmarkHeap,
+    'memory': benchmarkMemoryBounded,
+}
+
+def readCommand(argv):
+    parser = optparse.OptionParser(description = 'Benchmark the search data structures and algorithms')
+    parser.add_option('-b', '--benchmark', dest = 'benchmarks', default = ','.join(sorted(BENCHMARKS)),
+                      help = 'Comma separated benchmarks to run, from: %s' % ', '.join(sorted(BENCHMARKS)))
+    parser.add_option('-n', '--sizes', dest = 'sizes', default = '10000,100000,1000000',
+                      help = 'Comma separated problem sizes for the data structure benchmarks')
+    parser.add_option('--updates', dest = 'updates', type = 'int', default = 100,
+                      help = 'Number of decrease-key operations timed per size')
+    parser.add_option('--puzzleSize', dest = 'puzzleSize', type = 'int', default = 3,
+                      help = 'Rows of the sliding puzzles for the memory benchmark (4 for the fifteen puzzle)')
+    parser.add_option('--scramble', dest = 'scramble', type = 'int', default = 80,
+                      help = 'Random moves used to scramble each puzzle')
+    parser.add_option('--puzzles', dest = 'puzzles', type = 'int', default = 5,
+                      help = 'Number of puzzles for the memory benchmark')
+    parser.add_option('--seed', dest = 'seed', type = 'int', default = 0,
+                      help = 'Random seed for the generated puzzles')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    options.sizes = [int(n) for n in options.sizes.split(',')]
+    options.benchmarks = options.benchmarks.split(',')
+    for name in options.benchmarks:
+        if name not in BENCHMARKS:
+            raise Exception('Unknown benchmark: ' + name)
+    return options
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    for name in options.benchmarks:
+        print('== %s ==' % name)
+        BENCHMARKS[name](options)
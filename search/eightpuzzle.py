@@ -48,13 +48,19 @@ class EightPuzzleState:
 
         The configuration of the puzzle is stored in a 2-dimensional
         list (a list of lists) 'cells'.
+
+        Any square number of tiles is accepted, so a list of 16 numbers from
+        0 to 15 builds the fifteen puzzle.
         """
+        self.size = int(round(len(numbers) ** 0.5))
+        if self.size * self.size != len(numbers):
+            raise Exception('A sliding puzzle needs a square number of tiles, not %d' % len(numbers))
         self.cells = []
         numbers = numbers[:] # Make a copy so as not to cause side-effects.
         numbers.reverse()
-        for row in range( 3 ):
+        for row in range( self.size ):
             self.cells.append( [] )
-            for col in range( 3 ):
+            for col in range( self.size ):
                 self.cells[row].append( numbers.pop() )
                 if self.cells[row][col] == 0:
                     self.blankLocation = row, col
@@ -78,8 +84,8 @@ class EightPuzzleState:
         False
         """
         current = 0
-        for row in range( 3 ):
-            for col in range( 3 ):
+        for row in range( self.size ):
+            for col in range( self.size ):
                 if current != self.cells[row][col]:
                     return False
                 current += 1
@@ -99,11 +105,11 @@ class EightPuzzleState:
         row, col = self.blankLocation
         if(row != 0):
             moves.append('up')
-        if(row != 2):
+        if(row != self.size - 1):
             moves.append('down')
         if(col != 0):
             moves.append('left')
-        if(col != 2):
+        if(col != self.size - 1):
             moves.append('right')
         return moves
 
@@ -136,7 +142,7 @@ class EightPuzzleState:
             raise "Illegal Move"
 
         # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
+        newPuzzle = EightPuzzleState([0] * (self.size * self.size))
         newPuzzle.cells = [values[:] for values in self.cells]
         # And update it to reflect the move
         newPuzzle.cells[row][col] = self.cells[newrow][newcol]
@@ -155,7 +161,7 @@ class EightPuzzleState:
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range( 3 ):
+        for row in range( self.size ):
             if self.cells[row] != other.cells[row]:
                 return False
         return True
@@ -168,14 +174,15 @@ class EightPuzzleState:
           Returns a display string for the maze
         """
         lines = []
-        horizontalLine = ('-' * (13))
+        cellWidth = len(str(self.size * self.size - 1))
+        horizontalLine = ('-' * ((cellWidth + 3) * self.size + 1))
         lines.append(horizontalLine)
         for row in self.cells:
             rowLine = '|'
             for col in row:
                 if col == 0:
                     col = ' '
-                rowLine = rowLine + ' ' + col.__str__() + ' |'
+                rowLine = rowLine + ' ' + col.__str__().rjust(cellWidth) + ' |'
             lines.append(rowLine)
             lines.append(horizontalLine)
         return '\n'.join(lines)
@@ -196,7 +203,7 @@ class EightPuzzleSearchProblem(search.SearchProblem):
         self.puzzle = puzzle
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -262,20 +269,36 @@ def loadEightPuzzle(puzzleNumber):
     """
     return EightPuzzleState(EIGHT_PUZZLE_DATA[puzzleNumber])
 
-def createRandomEightPuzzle(moves=100):
+def createRandomEightPuzzle(moves=100, size=3):
     """
       moves: number of random moves to apply
+      size: number of rows (and columns) of the puzzle; 4 gives the fifteen puzzle
 
       Creates a random eight puzzle by applying
       a series of 'moves' random moves to a solved
       puzzle.
     """
-    puzzle = EightPuzzleState([0,1,2,3,4,5,6,7,8])
+    puzzle = EightPuzzleState(list(range(size * size)))
     for i in range(moves):
         # Execute a random legal move
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
+def puzzleManhattanHeuristic(state, problem=None):
+    """
+      The sum over all tiles (the blank excluded) of the Manhattan distance
+      between the tile and its goal cell.  Admissible and consistent, since
+      every move slides a single tile by one cell.
+    """
+    size = state.size
+    distance = 0
+    for row in range( size ):
+        for col in range( size ):
+            tile = state.cells[row][col]
+            if tile != 0:
+                distance += abs(row - tile // size) + abs(col - tile % size)
+    return distance
+
 if __name__ == '__main__':
     puzzle = createRandomEightPuzzle(25)
     print('A random puzzle:')
@@ -274,6 +274,105 @@ class Grid:
                 bools.append(False)
         return bools
 
+class BitGrid:
+    """
+    An immutable grid of booleans packed into a single Python int, bit
+    x * height + y holding cell (x, y) (the cell order of Grid.packBits).
+
+    It offers the read-only part of the Grid interface (grid[x][y], width,
+    height, count, asList) while copying, hashing and comparing in O(1) and
+    counting with a cached popcount, which makes it a cheap component of search
+    states.  Use without() to clear a cell: it returns a new BitGrid.
+    """
+    __slots__ = ('width', 'height', 'bits', '_count', '_hash')
+
+    def __init__(self, width, height, bits=0, count=None):
+        self.width = width
+        self.height = height
+        self.bits = bits
+        self._count = _popcount(bits) if count is None else count
+        self._hash = hash(bits)
+
+    def fromGrid(grid):
+        "Builds a BitGrid holding the True cells of a Grid"
+        bits = 0
+        for x, column in enumerate(grid.data):
+            for y, value in enumerate(column):
+                if value:
+                    bits |= 1 << (x * grid.height + y)
+        return BitGrid(grid.width, grid.height, bits)
+    fromGrid = staticmethod(fromGrid)
+
+    def __getitem__(self, x):
+        return _BitGridColumn(self.bits >> (x * self.height), self.height)
+
+    def isSet(self, x, y):
+        return (self.bits >> (x * self.height + y)) & 1 == 1
+
+    def without(self, x, y):
+        "Returns a BitGrid with cell (x, y) cleared (self if it is already clear)"
+        bit = 1 << (x * self.height + y)
+        if not self.bits & bit:
+            return self
+        return BitGrid(self.width, self.height, self.bits & ~bit, self._count - 1)
+
+    def __eq__(self, other):
+        if not isinstance(other, BitGrid): return False
+        return self.bits == other.bits and self.height == other.height and self.width == other.width
+
+    def __hash__(self):
+        return self._hash
+
+    def count(self, item=True):
+        if item: return self._count
+        return self.width * self.height - self._count
+
+    def asList(self, key=True):
+        if not key:
+            return [(x, y) for x in range(self.width) for y in range(self.height) if not self.isSet(x, y)]
+        cells = []
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            index = lowest.bit_length() - 1
+            cells.append((index // self.height, index % self.height))
+            bits ^= lowest
+        return cells
+
+    def copy(self):
+        return self
+
+    def deepCopy(self):
+        return self
+
+    def asGrid(self):
+        "Returns a mutable Grid with the same cells"
+        grid = Grid(self.width, self.height)
+        for x, y in self.asList():
+            grid[x][y] = True
+        return grid
+
+    def __str__(self):
+        return str(self.asGrid())
+
+class _BitGridColumn:
+    "Read-only column view returned by BitGrid[x], so that grid[x][y] works"
+    __slots__ = ('bits', 'height')
+
+    def __init__(self, bits, height):
+        self.bits = bits
+        self.height = height
+
+    def __getitem__(self, y):
+        if y < 0 or y >= self.height: raise IndexError(y)
+        return (self.bits >> y) & 1 == 1
+
+def _popcount(bits):
+    try:
+        return bits.bit_count()
+    except AttributeError: # Python < 3.10
+        return bin(bits).count('1')
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1,2)):
         return bitRep
@@ -0,0 +1,170 @@
+# mazeDistances.py
+# ----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+All-pairs shortest path distances between the free cells of a maze.
+
+The table is built once per wall layout with one breadth first search per free
+cell and stored as a flat array of unsigned shorts (2 bytes per pair).  It is
+saved under distanceCache/, next to layouts/, keyed by a hash of the walls, and
+later runs memory-map the saved file instead of rebuilding it.  Lookups are
+then a dictionary access and an array index:
+
+  distances = getMazeDistances(gameState.getWalls())
+  distances.getDistance((1, 1), (5, 3))
+"""
+
+import array
+import collections
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'distanceCache')
+
+UNREACHABLE = 0xFFFF
+
+# magic, little endian flag, width, height, number of free cells
+_HEADER = struct.Struct('<4sIIII')
+_MAGIC = b'PMD1'
+
+def wallsKey(walls):
+    "Returns a hex digest identifying a wall Grid"
+    description = '%d %d\n%s' % (walls.width, walls.height, str(walls))
+    return hashlib.sha1(description.encode('ascii')).hexdigest()
+
+class MazeDistances:
+    """
+    Shortest path distances between every pair of free cells of a wall Grid.
+
+    Cells are numbered in column-major order and the distance from cell i to
+    cell j is table[i * numCells + j].  The table is either an array('H') built
+    in memory or a memoryview over a memory-mapped cache file.
+    """
+    def __init__(self, walls, cacheDirectory=CACHE_DIRECTORY):
+        self.width, self.height = walls.width, walls.height
+        self.cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+        self.cellIndex = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.numCells = len(self.cells)
+        if self.numCells > UNREACHABLE:
+            raise Exception('Too many free cells for a 16 bit distance table: %d' % self.numCells)
+        self.key = wallsKey(walls)
+        self.path = None
+        self.table = None
+        if cacheDirectory is not None:
+            self.path = os.path.join(cacheDirectory, self.key + '.dist')
+            self.table = self._load()
+        if self.table is None:
+            self.table = self._build(walls)
+            if self.path is not None:
+                self._save()
+
+    def getDistance(self, pos1, pos2):
+        """
+        Returns the maze distance between two free integer positions, or
+        float('inf') if one cannot be reached from the other.
+        """
+        distance = self.table[self.cellIndex[pos1] * self.numCells + self.cellIndex[pos2]]
+        if distance == UNREACHABLE:
+            return float('inf')
+        return distance
+
+    def getDistancesFrom(self, pos):
+        "Returns the row of the table for pos, indexed like self.cells"
+        start = self.cellIndex[pos] * self.numCells
+        return self.table[start:start + self.numCells]
+
+    def _build(self, walls):
+        numCells, cellIndex = self.numCells, self.cellIndex
+        neighbors = []
+        for x, y in self.cells:
+            neighbors.append([cellIndex[n] for n in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)) if n in cellIndex])
+
+        table = array.array('H', [UNREACHABLE]) * (numCells * numCells)
+        for source in range(numCells):
+            row = [UNREACHABLE] * numCells
+            row[source] = 0
+            queue = collections.deque([source])
+            while queue:
+                cell = queue.popleft()
+                distance = row[cell] + 1
+                for neighbor in neighbors[cell]:
+                    if row[neighbor] == UNREACHABLE:
+                        row[neighbor] = distance
+                        queue.append(neighbor)
+            table[source * numCells:(source + 1) * numCells] = array.array('H', row)
+        return table
+
+    def _load(self):
+        "Memory-maps the cache file, or returns None if it is missing or stale"
+        try:
+            with open(self.path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        expected = (_MAGIC, sys.byteorder == 'little', self.width, self.height, self.numCells)
+        if (len(mapped) != _HEADER.size + 2 * self.numCells * self.numCells or
+                _HEADER.unpack_from(mapped) != expected):
+            mapped.close()
+            return None
+        return memoryview(mapped)[_HEADER.size:].cast('H')
+
+    def _save(self):
+        "Writes the table atomically; an unwritable cache directory is not an error"
+        header = _HEADER.pack(_MAGIC, sys.byteorder == 'little', self.width, self.height, self.numCells)
+        temporary = '%s.%d.tmp' % (self.path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temporary, 'wb') as f:
+                f.write(header)
+                self.table.tofile(f)
+            os.replace(temporary, self.path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+# Tables kept in memory, and wall Grids remembered by identity; beyond these
+# the least recently used are dropped
+MAX_TABLES = 16
+MAX_GRIDS = 64
+
+_TABLES = collections.OrderedDict() # wallsKey -> MazeDistances
+_GRIDS = collections.OrderedDict() # id(walls) -> (walls, wallsKey)
+
+def getMazeDistances(walls):
+    """
+    Returns the MazeDistances for a wall Grid, building or loading it on first
+    use.  Tables are shared by every Grid with the same walls, and each Grid
+    seen is also remembered by identity so repeated calls skip hashing it.
+    """
+    entry = _GRIDS.get(id(walls))
+    if entry is not None and entry[0] is walls:
+        key = entry[1]
+        _GRIDS.move_to_end(id(walls))
+    else:
+        key = wallsKey(walls)
+        _GRIDS[id(walls)] = (walls, key)
+        if len(_GRIDS) > MAX_GRIDS:
+            _GRIDS.popitem(last=False)
+    distances = _TABLES.get(key)
+    if distances is None:
+        distances = MazeDistances(walls)
+        _TABLES[key] = distances
+        if len(_TABLES) > MAX_TABLES:
+            _TABLES.popitem(last=False)
+    else:
+        _TABLES.move_to_end(key)
+    return distances
@@ -523,6 +523,8 @@ def readCommand( argv ):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--searchStats', dest='searchStats', metavar='FILE',
+                      help='Write the statistics of every search run (nodes, frontier, heuristic and phase timings) to FILE as JSON', default=None)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -532,6 +534,11 @@ def readCommand( argv ):
     # Fix the random seed
     if options.fixRandomSeed: random.seed('cs188')
 
+    # Collect search statistics
+    if options.searchStats:
+        import search
+        search.recordSearchStats(options.searchStats)
+
     # Choose a layout
     args['layout'] = layout.getLayout( options.layout )
     if args['layout'] == None: raise Exception("The layout " + options.layout + " cannot be found")
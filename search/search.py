@@ -17,6 +17,10 @@ In search.py, you will implement generic search algorithms which are called by
 Pacman agents (in searchAgents.py).
 """
 
+import atexit
+import json
+import sys
+import time
 import util
 
 class SearchProblem:
@@ -88,6 +92,238 @@ class SearchProblem:
         """
         util.raiseNotDefined()
 
+    def getGoalState(self):
+        """
+        Returns the single goal state of the problem.  Only needed by
+        bidirectionalSearch.
+        """
+        util.raiseNotDefined()
+
+    def expandReverse(self, state):
+        """
+          state: Search state
+
+        For a given state, this should return a list of triples, (parent,
+        action, stepCost), where 'action' taken from 'parent' leads to state at
+        a cost of 'stepCost', i.e. (state, action, stepCost) is one of the
+        triples returned by expand(parent).  Only needed by bidirectionalSearch.
+        """
+        util.raiseNotDefined()
+
+
+class SearchNodes:
+    """
+    An arena of search nodes shared by the graph search algorithms below.
+
+    A node is an integer index into parallel lists holding its state, the index
+    of its parent, the action that produced it and its path cost.  Frontiers
+    store node indices, so pushing a child is O(1) instead of copying the whole
+    action list, and the plan is rebuilt from parent pointers only once a goal
+    is found.
+    """
+    ROOT = -1
+
+    def __init__(self):
+        self.states = []
+        self.parents = []
+        self.actions = []
+        self.costs = []
+
+    def add(self, state, parent=ROOT, action=None, cost=0):
+        "Stores a new node and returns its index"
+        self.states.append(state)
+        self.parents.append(parent)
+        self.actions.append(action)
+        self.costs.append(cost)
+        return len(self.states) - 1
+
+    def getPath(self, node):
+        "Returns the list of actions leading from the root to node"
+        path = []
+        parents, actions = self.parents, self.actions
+        while parents[node] != SearchNodes.ROOT:
+            path.append(actions[node])
+            node = parents[node]
+        path.reverse()
+        return path
+
+    def __len__(self):
+        return len(self.states)
+
+    def getMemoryUsage(self):
+        "Bytes held by the arena's parallel lists (excluding the states themselves)"
+        return sum(sys.getsizeof(l) for l in (self.states, self.parents, self.actions, self.costs))
+
+class SearchStats:
+    """
+    Measurements of a single search run.  Every algorithm in this file creates
+    one, updates its counters while it runs and, when it returns, stores it as
+    problem._searchStats and hands it to the listeners registered with
+    addStatsListener.
+
+      generated:        nodes created, the start node included
+      expanded:         nodes whose children were generated
+      duplicatesPruned: nodes discarded because their state was already
+                        expanded, already queued at no higher cost or already
+                        on the current path
+      maxFrontier:      largest number of queued nodes (current path length
+                        for the depth first algorithms)
+      heuristicCalls / heuristicTime: calls to, and seconds spent in, the
+                        heuristic, counted only while a listener is registered
+      phases:           wall time in seconds of 'setup', 'search' and 'path'
+                        (plan reconstruction)
+    """
+    def __init__(self, problem, algorithm):
+        self.problem = problem
+        self.algorithm = algorithm
+        self.generated = 0
+        self.expanded = 0
+        self.duplicatesPruned = 0
+        self.maxFrontier = 0
+        self.heuristicCalls = 0
+        self.heuristicTime = 0.0
+        self.heuristicTimed = False
+        self.memory = 0
+        self.solutionDepth = None
+        self.phases = {}
+        self.phase = None
+        self.startTime = time.perf_counter()
+        self.startPhase('setup')
+
+    def startPhase(self, name):
+        "Ends the current phase, if any, and starts timing the named one"
+        now = time.perf_counter()
+        if self.phase is not None:
+            self.phases[self.phase] = self.phases.get(self.phase, 0.0) + now - self.phaseStart
+        self.phase, self.phaseStart = name, now
+
+    def timeHeuristic(self, heuristic):
+        """
+        Returns heuristic wrapped so that its calls and run time are counted,
+        or heuristic itself when no listener would see the counts.
+        """
+        if heuristic is nullHeuristic or not _statsListeners:
+            return heuristic
+        self.heuristicTimed = True
+        def timedHeuristic(state, problem=None):
+            start = time.perf_counter()
+            try:
+                return heuristic(state, problem)
+            finally:
+                self.heuristicCalls += 1
+                self.heuristicTime += time.perf_counter() - start
+        return timedHeuristic
+
+    def observeFrontier(self, *frontiers):
+        size = sum(len(frontier) for frontier in frontiers)
+        if size > self.maxFrontier:
+            self.maxFrontier = size
+
+    def getTotalTime(self):
+        return sum(self.phases.values())
+
+    def getEffectiveBranchingFactor(self):
+        """
+        The branching factor b* of a uniform tree of the solution's depth d
+        holding as many nodes as were generated: N = b* + b*^2 + ... + b*^d,
+        where N excludes the start node.  None if no plan of positive depth was
+        found.
+        """
+        if not self.solutionDepth:
+            return None
+        generated, depth = self.generated - 1, self.solutionDepth
+        def treeSize(b):
+            total, level = 0.0, 1.0
+            for i in range(depth):
+                level *= b
+                total += level
+                if total > generated:
+                    break
+            return total
+        low, high = 0.0, max(float(generated), 1.0)
+        for i in range(64):
+            middle = (low + high) / 2
+            if treeSize(middle) < generated:
+                low = middle
+            else:
+                high = middle
+        return (low + high) / 2
+
+    def finish(self, path, depth=None):
+        """
+        Stops the clock, publishes the statistics and returns path.  depth is
+        the number of search nodes on the solution if it differs from
+        len(path), as for jump point search.
+        """
+        self.startPhase(None)
+        if path is None:
+            self.solutionDepth = None
+        else:
+            self.solutionDepth = len(path) if depth is None else depth
+        self.problem._searchStats = self
+        for listener in _statsListeners:
+            listener(self)
+        return path
+
+    def asDict(self):
+        totalTime = self.getTotalTime()
+        return {'algorithm': self.algorithm,
+                'problem': type(self.problem).__name__,
+                'found': self.solutionDepth is not None,
+                'solutionDepth': self.solutionDepth,
+                'generated': self.generated,
+                'expanded': self.expanded,
+                'duplicatesPruned': self.duplicatesPruned,
+                'maxFrontier': self.maxFrontier,
+                'effectiveBranchingFactor': self.getEffectiveBranchingFactor(),
+                'heuristicCalls': self.heuristicCalls,
+                'heuristicTime': self.heuristicTime,
+                'memory': self.memory,
+                'phases': dict(self.phases),
+                'totalTime': totalTime,
+                'nodesPerSecond': self.generated / totalTime if totalTime > 0 else None}
+
+    def __str__(self):
+        branching = self.getEffectiveBranchingFactor()
+        heuristic = ''
+        if self.heuristicTimed:
+            heuristic = 'heuristic %d calls in %.3fs, ' % (self.heuristicCalls, self.heuristicTime)
+        return ('%s: generated %d, expanded %d, pruned %d, max frontier %d, branching factor %s, %s%.3fs total' %
+                (self.algorithm, self.generated, self.expanded, self.duplicatesPruned, self.maxFrontier,
+                 '-' if branching is None else '%.2f' % branching, heuristic, self.getTotalTime()))
+
+_statsListeners = []
+
+def addStatsListener(listener):
+    "Registers listener(stats) to be called with the SearchStats of every search"
+    _statsListeners.append(listener)
+
+def removeStatsListener(listener):
+    _statsListeners.remove(listener)
+
+def recordSearchStats(filename):
+    """
+    Collects the statistics of every search run from now on and writes them to
+    filename as a JSON list when the program exits.
+    """
+    records = []
+    addStatsListener(lambda stats: records.append(stats.asDict()))
+    def write():
+        with open(filename, 'w') as f:
+            json.dump(records, f, indent=2)
+    atexit.register(write)
+
+def _finishSearch(stats, nodes, node=None):
+    """
+    Records the node store size and returns the plan ending at node, or None
+    if the search failed.
+    """
+    stats.memory = nodes.getMemoryUsage()
+    path = None
+    if node is not None:
+        stats.startPhase('path')
+        path = nodes.getPath(node)
+    return stats.finish(path)
 
 def tinyMazeSearch(problem):
     """
@@ -112,20 +348,31 @@ def depthFirstSearch(problem):
     print("Start:", problem.getStartState())
     print("Is the start a goal?", problem.isGoalState(problem.getStartState()))
     """
+    stats = SearchStats(problem, 'depthFirstSearch')
+    nodes = SearchNodes()
     frontier = util.Stack()
-    frontier.push((problem.getStartState(), []))
+    frontier.push(nodes.add(problem.getStartState()))
+    stats.generated += 1
     expanded = set()
 
+    stats.startPhase('search')
     while not frontier.isEmpty():
-        state, path = frontier.pop()
+        node = frontier.pop()
+        state = nodes.states[node]
         if problem.isGoalState(state):
-            return path
+            return _finishSearch(stats, nodes, node)
 
         if not state in expanded:
             expanded.add(state)
+            stats.expanded += 1
             for child in problem.expand(state):
                 next_state, direction, cost = child
-                frontier.push((next_state, path+[direction]))
+                frontier.push(nodes.add(next_state, node, direction))
+                stats.generated += 1
+            stats.observeFrontier(frontier)
+        else:
+            stats.duplicatesPruned += 1
+    return _finishSearch(stats, nodes)
 
     """comandos: 
     py pacman.py -l tinyMaze -p SearchAgent
@@ -138,20 +385,31 @@ ou custo correspondente."""
 
 def breadthFirstSearch(problem):
     """Search the shallowest nodes in the search tree first."""
+    stats = SearchStats(problem, 'breadthFirstSearch')
+    nodes = SearchNodes()
     frontier = util.Queue()
-    frontier.push((problem.getStartState(), []))
+    frontier.push(nodes.add(problem.getStartState()))
+    stats.generated += 1
     expanded = set()
 
+    stats.startPhase('search')
     while not frontier.isEmpty():
-        state, path = frontier.pop()
+        node = frontier.pop()
+        state = nodes.states[node]
         if problem.isGoalState(state):
-            return path
+            return _finishSearch(stats, nodes, node)
 
         if not state in expanded:
             expanded.add(state)
+            stats.expanded += 1
             for child in problem.expand(state):
                 next_state, direction, cost = child
-                frontier.push((next_state, path+[direction]))
+                frontier.push(nodes.add(next_state, node, direction))
+                stats.generated += 1
+            stats.observeFrontier(frontier)
+        else:
+            stats.duplicatesPruned += 1
+    return _finishSearch(stats, nodes)
 
 def nullHeuristic(state, problem=None):
     """
@@ -160,23 +418,397 @@ def nullHeuristic(state, problem=None):
     """
     return 0
 
+def uniformCostSearch(problem):
+    """Search the node of least total cost first."""
+    return aStarSearch(problem)
+
 def aStarSearch(problem, heuristic=nullHeuristic):
-    """Search the node that has the lowest combined cost and heuristic first."""
-    frontier = util.PriorityQueue()
-    frontier.push((problem.getStartState(), [], 0), 0)
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+
+    The frontier holds each state at most once: when a cheaper path to a
+    queued state is found its priority is lowered in place with
+    IndexedPriorityQueue.update, and frontierNodes tracks the node currently
+    representing every queued state.
+    """
+    stats = SearchStats(problem, 'aStarSearch' if heuristic is not nullHeuristic else 'uniformCostSearch')
+    heuristic = stats.timeHeuristic(heuristic)
+    nodes = SearchNodes()
+    frontier = util.IndexedPriorityQueue()
+    start = problem.getStartState()
+    frontierNodes = {start: nodes.add(start)}
+    frontier.push(start, 0)
+    stats.generated += 1
     expanded = set()
 
+    stats.startPhase('search')
     while not frontier.isEmpty():
-        state, path, cost = frontier.pop()
+        state = frontier.pop()
+        node = frontierNodes.pop(state)
         if problem.isGoalState(state):
-            return path
-        if not state in expanded:
-            expanded.add(state)
-            for child in problem.expand(state):
-                next_state, direction, next_cost = child
-                frontier.push((next_state, path+[direction], cost+next_cost), heuristic(next_state, problem) + cost + next_cost)
+            return _finishSearch(stats, nodes, node)
+        expanded.add(state)
+        stats.expanded += 1
+        cost = nodes.costs[node]
+        for child in problem.expand(state):
+            next_state, direction, next_cost = child
+            stats.generated += 1
+            if next_state in expanded:
+                stats.duplicatesPruned += 1
+                continue
+            child_cost = cost + next_cost
+            queued = frontierNodes.get(next_state)
+            if queued is not None and nodes.costs[queued] <= child_cost:
+                stats.duplicatesPruned += 1
+                continue
+            frontierNodes[next_state] = nodes.add(next_state, node, direction, child_cost)
+            frontier.update(next_state, heuristic(next_state, problem) + child_cost)
+        stats.observeFrontier(frontier)
+    return _finishSearch(stats, nodes)
+
+def iterativeDeepeningAStarSearch(problem, heuristic=nullHeuristic):
+    """
+    Repeat a depth first search bounded by f = cost + heuristic, raising the
+    bound each time to the smallest f that exceeded it, until a goal is
+    reached (IDA*).  Only the current path is kept, so memory is O(depth)
+    instead of the frontier and closed set of aStarSearch; states are pruned
+    only when they already lie on the current path.  Optimal for admissible
+    heuristics.
+    """
+    stats = SearchStats(problem, 'iterativeDeepeningAStarSearch')
+    heuristic = stats.timeHeuristic(heuristic)
+    start = problem.getStartState()
+    stats.generated += 1
+    bound = heuristic(start, problem)
+    stats.startPhase('search')
+    while True:
+        path, bound = _costBoundedSearch(problem, heuristic, start, bound, stats)
+        if path is not None or bound == float('inf'):
+            stats.memory = 3 * sys.getsizeof([None] * stats.maxFrontier)
+            return stats.finish(path)
+
+def _costBoundedSearch(problem, heuristic, start, bound, stats):
+    """
+    One IDA* iteration.  Returns (plan, bound) when a goal is found and
+    (None, smallest f above bound) otherwise.
+    """
+    if problem.isGoalState(start):
+        return [], bound
+    nextBound = float('inf')
+    # The current path: its states, their path costs, the actions between them
+    # and an iterator over the children left to try at each level
+    states, costs, actions = [start], [0], []
+    children = [iter(problem.expand(start))]
+    stats.expanded += 1
+    onPath = set(states)
+    while children:
+        child = next(children[-1], None)
+        if child is None:
+            children.pop()
+            costs.pop()
+            onPath.discard(states.pop())
+            if actions:
+                actions.pop()
+            continue
+        next_state, direction, step_cost = child
+        stats.generated += 1
+        if next_state in onPath:
+            stats.duplicatesPruned += 1
+            continue
+        child_cost = costs[-1] + step_cost
+        f = child_cost + heuristic(next_state, problem)
+        if f > bound:
+            nextBound = min(nextBound, f)
+            continue
+        actions.append(direction)
+        if problem.isGoalState(next_state):
+            return actions, bound
+        states.append(next_state)
+        costs.append(child_cost)
+        onPath.add(next_state)
+        children.append(iter(problem.expand(next_state)))
+        stats.expanded += 1
+        stats.maxFrontier = max(stats.maxFrontier, len(states))
+    return None, nextBound
+
+def recursiveBestFirstSearch(problem, heuristic=nullHeuristic):
+    """
+    Recursive best-first search (RBFS).  Explores the best child below the f
+    value of the best alternative sibling, backing up the f value of the
+    explored subtree when it gives up on it, so it expands nodes in best-first
+    order while keeping only the current path and its siblings in memory:
+    O(depth * branching factor).  Optimal for admissible heuristics.
+    """
+    stats = SearchStats(problem, 'recursiveBestFirstSearch')
+    heuristic = stats.timeHeuristic(heuristic)
+    start = problem.getStartState()
+    stats.generated += 1
+    onPath = set([start])
+
+    def search(state, cost, f, limit, depth):
+        if problem.isGoalState(state):
+            return [], f
+        stats.maxFrontier = max(stats.maxFrontier, depth)
+        stats.expanded += 1
+        children = []
+        for next_state, direction, step_cost in problem.expand(state):
+            stats.generated += 1
+            if next_state in onPath:
+                stats.duplicatesPruned += 1
+                continue
+            child_cost = cost + step_cost
+            # A child's f value is never below its parent's backed-up value
+            children.append([max(child_cost + heuristic(next_state, problem), f), child_cost, next_state, direction])
+        if not children:
+            return None, float('inf')
+        while True:
+            children.sort(key=lambda child: child[0])
+            best = children[0]
+            if best[0] > limit:
+                return None, best[0]
+            alternative = children[1][0] if len(children) > 1 else float('inf')
+            onPath.add(best[2])
+            plan, best[0] = search(best[2], best[1], best[0], min(limit, alternative), depth + 1)
+            onPath.discard(best[2])
+            if plan is not None:
+                plan.append(best[3])
+                return plan, best[0]
+
+    startHeuristic = heuristic(start, problem)
+    stats.startPhase('search')
+    plan, _ = search(start, 0, startHeuristic, float('inf'), 1)
+    stats.memory = sys.getsizeof([None] * stats.maxFrontier)
+    if plan is not None:
+        stats.startPhase('path')
+        plan.reverse()
+    return stats.finish(plan)
+
+def jumpPointSearch(problem, heuristic=nullHeuristic):
+    """
+    Jump Point Search for 4-connected, unit-cost grid problems whose states are
+    (x, y) positions and whose walls are given by problem.walls, such as
+    PositionSearchProblem and AnyFoodSearchProblem.
+
+    Instead of expanding every cell, A* runs over jump points: straight moves
+    are followed ('jumped') until they reach a goal, a dead end or a cell where
+    a wall forces a turn, so the many equivalent paths through open areas are
+    never generated.  Canonical paths move horizontally until a wall forces a
+    vertical turn, and every cell of a vertical run scans horizontally for jump
+    points.  Goals are tested on every scanned cell, so any goal test works.
+    Returns an optimal plan (of the same cost as aStarSearch with an admissible
+    heuristic); problem._expanded counts expanded jump points only.
+    """
+    from game import Directions
+    stats = SearchStats(problem, 'jumpPointSearch')
+    heuristic = stats.timeHeuristic(heuristic)
+    walls = problem.walls
+    width, height = walls.width, walls.height
+    vectors = {Directions.NORTH: (0, 1), Directions.SOUTH: (0, -1),
+               Directions.EAST: (1, 0), Directions.WEST: (-1, 0)}
+
+    def isFree(x, y):
+        return 0 <= x < width and 0 <= y < height and not walls[x][y]
+
+    def jumpHorizontally(x, y, dx):
+        "Returns the first jump point reached moving by dx from (x, y), or None"
+        while True:
+            x += dx
+            if not isFree(x, y):
+                return None
+            if problem.isGoalState((x, y)):
+                return (x, y)
+            for dy in (1, -1):
+                if isFree(x, y + dy) and not isFree(x - dx, y + dy):
+                    return (x, y)
+
+    def jumpVertically(x, y, dy):
+        "Returns the first jump point reached moving by dy from (x, y), or None"
+        while True:
+            y += dy
+            if not isFree(x, y):
+                return None
+            if problem.isGoalState((x, y)):
+                return (x, y)
+            if jumpHorizontally(x, y, 1) is not None or jumpHorizontally(x, y, -1) is not None:
+                return (x, y)
+
+    def prunedDirections(state, direction):
+        "Directions worth following from a jump point entered by direction"
+        if direction is None:
+            return list(vectors)
+        dx, dy = vectors[direction]
+        if dy != 0:
+            return [direction, Directions.EAST, Directions.WEST]
+        x, y = state
+        directions = [direction]
+        for vertical, turnDy in ((Directions.NORTH, 1), (Directions.SOUTH, -1)):
+            if isFree(x, y + turnDy) and not isFree(x - dx, y + turnDy):
+                directions.append(vertical)
+        return directions
+
+    nodes = SearchNodes()
+    frontier = util.IndexedPriorityQueue()
+    start = problem.getStartState()
+    frontierNodes = {start: nodes.add(start)}
+    frontier.push(start, 0)
+    stats.generated += 1
+    expanded = set()
+
+    stats.startPhase('search')
+    while not frontier.isEmpty():
+        state = frontier.pop()
+        node = frontierNodes.pop(state)
+        if problem.isGoalState(state):
+            stats.memory = nodes.getMemoryUsage()
+            stats.startPhase('path')
+            path = []
+            segments = nodes.getPath(node)
+            for direction, steps in segments:
+                path.extend([direction] * steps)
+            return stats.finish(path, len(segments))
+        expanded.add(state)
+        stats.expanded += 1
+        problem._expanded = getattr(problem, '_expanded', 0) + 1
+        cost = nodes.costs[node]
+        entered = nodes.actions[node][0] if nodes.actions[node] else None
+        x, y = state
+        for direction in prunedDirections(state, entered):
+            dx, dy = vectors[direction]
+            if dy == 0:
+                jumpPoint = jumpHorizontally(x, y, dx)
+            else:
+                jumpPoint = jumpVertically(x, y, dy)
+            if jumpPoint is None:
+                continue
+            stats.generated += 1
+            if jumpPoint in expanded:
+                stats.duplicatesPruned += 1
+                continue
+            steps = abs(jumpPoint[0] - x) + abs(jumpPoint[1] - y)
+            child_cost = cost + steps
+            queued = frontierNodes.get(jumpPoint)
+            if queued is not None and nodes.costs[queued] <= child_cost:
+                stats.duplicatesPruned += 1
+                continue
+            frontierNodes[jumpPoint] = nodes.add(jumpPoint, node, (direction, steps), child_cost)
+            frontier.update(jumpPoint, heuristic(jumpPoint, problem) + child_cost)
+        stats.observeFrontier(frontier)
+    return _finishSearch(stats, nodes)
+
+class ReverseSearchProblem(SearchProblem):
+    """
+    A view of a single-goal problem with an invertible transition model that
+    searches from its goal back to its start.  Children are the parents given
+    by problem.expandReverse, and the 'goal' attribute is the original start
+    state, so position heuristics such as manhattanHeuristic estimate the
+    distance back to the start.  Any other attribute (walls, costFn, ...) is
+    read from the wrapped problem.
+    """
+    def __init__(self, problem):
+        self.problem = problem
+        self.goal = problem.getStartState()
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def getStartState(self):
+        return self.problem.getGoalState()
+
+    def isGoalState(self, state):
+        return state == self.goal
+
+    def expand(self, state):
+        return self.problem.expandReverse(state)
+
+def bidirectionalSearch(problem, heuristic=nullHeuristic):
+    """
+    Search forward from the start and backward from the goal at the same time,
+    stopping once the two frontiers prove that no shorter path than the best
+    meeting point found so far exists.  With the null heuristic this is
+    bidirectional uniform cost search (bidirectional BFS on unit costs); with a
+    consistent heuristic it is bidirectional A* using the average potential
+    (h(state, forward) - h(state, backward)) / 2, which keeps the reduced step
+    costs non-negative in both directions.
+
+    The problem must have a single goal returned by getGoalState and an
+    invertible transition model given by expandReverse.  Both directions count
+    towards problem._expanded, so its expansions are directly comparable with
+    bfs and astar.
+    """
+    stats = SearchStats(problem, 'bidirectionalSearch')
+    heuristic = stats.timeHeuristic(heuristic)
+    reverse = ReverseSearchProblem(problem)
+    start, goal = problem.getStartState(), problem.getGoalState()
+    nodes = SearchNodes()
+    stats.generated += 1
+    if start == goal:
+        return _finishSearch(stats, nodes, nodes.add(start))
+
+    potentials = {}
+    def potential(state):
+        if state not in potentials:
+            potentials[state] = (heuristic(state, problem) - heuristic(state, reverse)) / 2.0
+        return potentials[state]
+
+    # One record per direction: problem to expand, frontier, node of the best
+    # path found to every reached state, closed set and sign of the potential
+    forward = (problem, util.IndexedPriorityQueue(), {}, set(), 1)
+    backward = (reverse, util.IndexedPriorityQueue(), {}, set(), -1)
+    for (searchProblem, frontier, reached, closed, sign), state in ((forward, start), (backward, goal)):
+        reached[state] = nodes.add(state)
+        frontier.push(state, sign * potential(state))
+    stats.generated += 1
+
+    stats.startPhase('search')
+    bestCost, meeting = float('inf'), None
+    while not forward[1].isEmpty() and not backward[1].isEmpty():
+        if forward[1].getMinPriority() + backward[1].getMinPriority() >= bestCost:
+            break
+        # Expand the direction with the smaller frontier
+        if len(forward[1]) <= len(backward[1]):
+            current, other = forward, backward
+        else:
+            current, other = backward, forward
+        searchProblem, frontier, reached, closed, sign = current
+        state = frontier.pop()
+        closed.add(state)
+        stats.expanded += 1
+        node = reached[state]
+        cost = nodes.costs[node]
+        for child_state, direction, step_cost in searchProblem.expand(state):
+            stats.generated += 1
+            if child_state in closed:
+                stats.duplicatesPruned += 1
+                continue
+            child_cost = cost + step_cost
+            queued = reached.get(child_state)
+            if queued is not None and nodes.costs[queued] <= child_cost:
+                stats.duplicatesPruned += 1
+                continue
+            child = nodes.add(child_state, node, direction, child_cost)
+            reached[child_state] = child
+            frontier.update(child_state, child_cost + sign * potential(child_state))
+            otherNode = other[2].get(child_state)
+            if otherNode is not None and child_cost + nodes.costs[otherNode] < bestCost:
+                bestCost = child_cost + nodes.costs[otherNode]
+                meeting = (child, otherNode) if current is forward else (otherNode, child)
+        stats.observeFrontier(forward[1], backward[1])
+
+    stats.memory = nodes.getMemoryUsage()
+    if meeting is None:
+        return stats.finish(None)
+    stats.startPhase('path')
+    forwardNode, backwardNode = meeting
+    # Backward nodes point towards the goal, so their path read from the root
+    # is the remaining plan in reverse
+    return stats.finish(nodes.getPath(forwardNode) + list(reversed(nodes.getPath(backwardNode))))
 
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
-astar = aStarSearch
\ No newline at end of file
+astar = aStarSearch
+ucs = uniformCostSearch
+bidirectional = bidirectionalSearch
+idastar = iterativeDeepeningAStarSearch
+rbfs = recursiveBestFirstSearch
+jps = jumpPointSearch
\ No newline at end of file
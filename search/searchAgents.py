@@ -37,9 +37,12 @@ Good luck and happy searching!
 from game import Directions
 from game import Agent
 from game import Actions
+from game import BitGrid
 import util
 import time
+import collections
 import search
+import mazeDistances
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
@@ -116,6 +119,10 @@ class SearchAgent(Agent):
         totalCost = problem.getCostOfActionSequence(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if '_searchStats' in dir(problem):
+            stats = problem._searchStats
+            print('Search stats: %s' % stats)
+            print('Search phases: %s' % ', '.join('%s %.3fs' % phase for phase in sorted(stats.phases.items())))
 
     def getAction(self, state):
         """
@@ -206,6 +213,29 @@ class PositionSearchProblem(search.SearchProblem):
 
         return children
 
+    def expandReverse(self, state):
+        """
+        Returns parent states, the actions that lead from them to state and
+        the cost of entering state.  Moves on the grid are reversible, so the
+        parents are simply the legal neighbours of state.
+        """
+        parents = []
+        cost = self.costFn(state)
+        for action in self.getActions(state):
+            parent = self.getNextState(state, action)
+            parents.append( ( parent, Directions.REVERSE[action], cost) )
+
+        # Bookkeeping for display purposes
+        self._expanded += 1 # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return parents
+
+    def getGoalState(self):
+        return self.goal
+
     def getActions(self, state):
         possible_directions = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
         valid_actions_from_state = []
@@ -417,10 +447,14 @@ class FoodSearchProblem:
 
     A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
       pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+      foodGrid:       a BitGrid (see game.py) of either True or False, specifying remaining food
+
+    The food is an immutable bitset rather than a Grid, so generating, hashing
+    and comparing states and counting the remaining food are O(1).  It still
+    supports foodGrid[x][y], foodGrid.count() and foodGrid.asList().
     """
     def __init__(self, startingGameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+        self.start = (startingGameState.getPacmanPosition(), BitGrid.fromGrid(startingGameState.getFood()))
         self.walls = startingGameState.getWalls()
         self.startingGameState = startingGameState
         self._expanded = 0 # DO NOT CHANGE
@@ -464,9 +498,7 @@ class FoodSearchProblem:
         x, y = state[0]
         dx, dy = Actions.directionToVector(action)
         nextx, nexty = int(x + dx), int(y + dy)
-        nextFood = state[1].copy()
-        nextFood[nextx][nexty] = False
-        return ((nextx, nexty), nextFood)
+        return ((nextx, nexty), state[1].without(nextx, nexty))
 
     def getCostOfActionSequence(self, actions):
         """Returns the cost of a particular sequence of actions.  If those actions
@@ -501,7 +533,7 @@ def foodHeuristic(state, problem):
     other hand, inadmissible or inconsistent heuristics may find optimal
     solutions, so be careful.
 
-    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a Grid
+    The state is a tuple ( pacmanPosition, foodGrid ) where foodGrid is a BitGrid
     (see game.py) of either True or False. You can call foodGrid.asList() to get
     a list of food coordinates instead.
 
@@ -517,16 +549,49 @@ def foodHeuristic(state, problem):
     problem.heuristicInfo['wallCount']
     """
     position, foodGrid = state
-    distances = []
-    for x in range(foodGrid.width):
-
-        for y in range(foodGrid.height):
-            if foodGrid[x][y] == True:
-                dist= mazeDistance(position, (x,y), problem.startingGameState) ## Com mazeDistance, demora muito mais. Para cada chamada de mazeDistance, ela chama um bfs com um PositionSearchProblem
-                distances.append(dist)
-    if not distances:
+    if 'mazeDistances' not in problem.heuristicInfo:
+        problem.heuristicInfo['mazeDistances'] = mazeDistances.getMazeDistances(problem.walls)
+        problem.heuristicInfo['spanningTrees'] = collections.OrderedDict()
+    distanceOracle = problem.heuristicInfo['mazeDistances'] ## Distâncias reais do labirinto, pré-calculadas uma vez por layout
+    foodList = foodGrid.asList()
+    if not foodList:
         return 0
-    return max(distances)
+
+    # Any plan walks from Pacman to some dot and then along a path through all
+    # the dots, which is at least as long as their minimum spanning tree
+    nearest = min(distanceOracle.getDistance(position, food) for food in foodList)
+    return nearest + foodSpanningTreeCost(foodGrid, foodList, problem)
+
+MAX_SPANNING_TREES = 50000
+
+def foodSpanningTreeCost(foodGrid, foodList, problem):
+    """
+    Returns the weight of the minimum spanning tree of the remaining food under
+    maze distance (Prim's algorithm).  Results are memoised in
+    problem.heuristicInfo['spanningTrees'], keyed by the food bitmask, and the
+    least recently used entries are dropped beyond MAX_SPANNING_TREES.
+    """
+    cache = problem.heuristicInfo['spanningTrees']
+    key = foodGrid.bits
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    distanceOracle = problem.heuristicInfo['mazeDistances']
+    remaining = foodList[1:]
+    closest = [distanceOracle.getDistance(foodList[0], food) for food in remaining]
+    total = 0
+    while remaining:
+        i = closest.index(min(closest))
+        added = remaining.pop(i)
+        total += closest.pop(i)
+        for j, food in enumerate(remaining):
+            closest[j] = min(closest[j], distanceOracle.getDistance(added, food))
+
+    cache[key] = total
+    if len(cache) > MAX_SPANNING_TREES:
+        cache.popitem(last=False)
+    return total
 
 class ClosestDotSearchAgent(SearchAgent):
     "Search for all food using a sequence of searches"
@@ -599,11 +664,22 @@ def mazeDistance(point1, point2, gameState):
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
     This might be a useful helper function for your ApproximateSearchAgent.
+
+    Distances come from the all-pairs table in mazeDistances.py, built once per
+    layout, so each call is O(1).  Use mazeDistanceBySearch to run a search
+    instead.
     """
     x1, y1 = point1
     x2, y2 = point2
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
+    return mazeDistances.getMazeDistances(walls).getDistance(point1, point2)
+
+def mazeDistanceBySearch(point1, point2, gameState):
+    """
+    Returns the maze distance between two points by searching a
+    PositionSearchProblem, without building the all-pairs table.
+    """
     prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
\ No newline at end of file
+    return len(search.bidirectionalSearch(prob))
\ No newline at end of file
@@ -29,6 +29,7 @@
 import sys
 import inspect
 import heapq, random
+import collections
 
 
 class FixedRandom:
@@ -147,14 +148,17 @@ class Stack:
         "Returns true if the stack is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
-        self.list = []
+        self.list = collections.deque()
 
     def push(self,item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+        self.list.appendleft(item)
 
     def pop(self):
         """
@@ -167,6 +171,9 @@ class Queue:
         "Returns true if the queue is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class PriorityQueue:
     """
       Implements a priority queue data structure. Each inserted item
@@ -190,6 +197,9 @@ class PriorityQueue:
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def __len__(self):
+        return len(self.heap)
+
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
@@ -222,6 +232,138 @@ class PriorityQueueWithFunction(PriorityQueue):
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
 
+class IndexedPriorityQueue:
+    """
+      A binary heap with a position map from each item to its slot in the
+      heap. The map makes membership tests O(1) and lets update() and remove()
+      run in O(log n) by sifting the entry in place, instead of the linear scan
+      and heapify done by PriorityQueue.update. Items must be hashable and each
+      item is stored at most once, so search frontiers never hold duplicates.
+
+      Ties are broken by insertion order, exactly as in PriorityQueue, and the
+      push/pop/isEmpty/update interface is the same so it can be used as a
+      drop-in replacement.
+    """
+    def  __init__(self):
+        self.heap = []      # entries are [(priority, count), item]
+        self.index = {}     # item -> position of its entry in self.heap
+        self.count = 0
+
+    def push(self, item, priority):
+        "Adds item, or lowers its priority if it is already queued"
+        if item in self.index:
+            self.update(item, priority)
+            return
+        self.heap.append([(priority, self.count), item])
+        self.count += 1
+        self._siftUp(len(self.heap) - 1)
+
+    def pop(self):
+        "Removes and returns the lowest-priority item"
+        heap = self.heap
+        last = heap.pop()
+        if heap:
+            item = heap[0][1]
+            heap[0] = last
+            self._siftDown(0)
+        else:
+            item = last[1]
+        del self.index[item]
+        return item
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def getPriority(self, item):
+        return self.heap[self.index[item]][0][0]
+
+    def getMinPriority(self):
+        "Returns the priority of the item pop() would return"
+        return self.heap[0][0][0]
+
+    def update(self, item, priority):
+        # Same contract as PriorityQueue.update: lower the priority of a queued
+        # item, ignore a higher or equal one, and push items not yet queued.
+        position = self.index.get(item)
+        if position is None:
+            self.push(item, priority)
+            return
+        entry = self.heap[position]
+        if priority < entry[0][0]:
+            entry[0] = (priority, entry[0][1])
+            self._siftUp(position)
+
+    def remove(self, item):
+        "Removes item from the queue if it is present"
+        position = self.index.pop(item, None)
+        if position is None:
+            return
+        last = self.heap.pop()
+        if position < len(self.heap):
+            self.heap[position] = last
+            self._siftDown(self._siftUp(position))
+
+    def _siftUp(self, position):
+        "Moves the entry at position towards the root; returns its final position"
+        heap, index = self.heap, self.index
+        entry = heap[position]
+        key = entry[0]
+        while position > 0:
+            parentPosition = (position - 1) >> 1
+            parent = heap[parentPosition]
+            if key < parent[0]:
+                heap[position] = parent
+                index[parent[1]] = position
+                position = parentPosition
+            else:
+                break
+        heap[position] = entry
+        index[entry[1]] = position
+        return position
+
+    def _siftDown(self, position):
+        "Moves the entry at position towards the leaves"
+        heap, index = self.heap, self.index
+        size = len(heap)
+        entry = heap[position]
+        key = entry[0]
+        child = 2 * position + 1
+        while child < size:
+            right = child + 1
+            if right < size and heap[right][0] < heap[child][0]:
+                child = right
+            smallest = heap[child]
+            if smallest[0] < key:
+                heap[position] = smallest
+                index[smallest[1]] = position
+                position = child
+                child = 2 * position + 1
+            else:
+                break
+        heap[position] = entry
+        index[entry[1]] = position
+
+class IndexedPriorityQueueWithFunction(IndexedPriorityQueue):
+    """
+    The IndexedPriorityQueue counterpart of PriorityQueueWithFunction: push
+    takes only the item and its priority comes from the priority function.
+    """
+    def  __init__(self, priorityFunction):
+        "priorityFunction (item) -> priority"
+        self.priorityFunction = priorityFunction
+        IndexedPriorityQueue.__init__(self)
+
+    def push(self, item):
+        "Adds an item to the queue with priority from the priority function"
+        IndexedPriorityQueue.push(self, item, self.priorityFunction(item))
+
+
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"
     return abs( xy1[0] - xy2[0] ) + abs( xy1[1] - xy2[1] )